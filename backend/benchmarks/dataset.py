@@ -0,0 +1,231 @@
+"""
+Генерация синтетического набора данных для замеров производительности.
+
+Данные пишутся пакетами через bulk_create, поэтому сигналы моделей
+не срабатывают: счётчики и списки покупок пересчитываются в конце
+генерации, а кэши нужно сбрасывать вручную (reset_caches).
+
+Популярность авторов и рецептов распределена по степенному закону:
+на немногих авторов подписана большая часть пользователей, немногие
+рецепты собирают большую часть избранного и корзин.
+"""
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from ingredients.autocomplete import INGREDIENTS_CATALOGUE
+from ingredients.models import Ingredient
+from recipes.counters import rebuild_counters
+from recipes.response_cache import ALL_RECIPES, AUTHORS, invalidate
+from recipes.shopping_list import rebuild_shopping_lists
+from recipes.models import (Favorite, IngredientInRecipe, Recipe,
+                            ShoppingCart)
+from tags.models import Tag
+from tags.registry import TAGS_CATALOGUE, reset_tag_registry
+from users.models import Subscription
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+BENCHMARK_PASSWORD = 'benchmark-password'
+BENCHMARK_IMAGE = 'recipes/images/benchmark.png'
+MEASUREMENT_UNITS = ('г', 'кг', 'мл', 'л', 'шт.', 'ст. л.', 'ч. л.')
+
+
+def _sample(rng, population, low, high):
+    size = min(len(population), rng.randint(low, high))
+    return rng.sample(population, size)
+
+
+def _popularity(size, exponent):
+    """Накопленные веса Ципфа: вес i-го по популярности — 1 / i**exponent."""
+    total = 0.0
+    weights = []
+    for rank in range(1, size + 1):
+        total += rank ** -exponent
+        weights.append(total)
+    return weights
+
+
+def _sample_popular(rng, population, weights, low, high):
+    """Выборка без повторов, где популярные элементы выпадают чаще."""
+    size = min(len(population), rng.randint(low, high))
+    chosen = {}
+    while len(chosen) < size:
+        for item in rng.choices(
+            population, cum_weights=weights, k=size - len(chosen)
+        ):
+            chosen[item.pk] = item
+    return list(chosen.values())
+
+
+@transaction.atomic
+def generate_dataset(prefix='bench', users=200, recipes=2000, tags=12,
+                     ingredients=500, ingredients_per_recipe=(3, 12),
+                     tags_per_recipe=(1, 3), favorites_per_user=20,
+                     carts_per_user=5, subscriptions_per_user=10,
+                     popularity_exponent=1.1, seed=0):
+    """
+    Создаёт пользователей, теги, ингредиенты, рецепты, избранное,
+    корзины и подписки. Все имена начинаются с prefix, поэтому функцию
+    можно вызывать повторно с другим префиксом, чтобы нарастить объём.
+    popularity_exponent задаёт крутизну степенного распределения
+    подписок, избранного и корзин; 0 — равномерное.
+    Возвращает словарь с количеством созданных объектов.
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCHMARK_PASSWORD)
+
+    user_objs = User.objects.bulk_create(
+        [
+            User(
+                username=f'{prefix}_user_{i}',
+                email=f'{prefix}_user_{i}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+                password=password,
+            )
+            for i in range(users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    tag_objs = Tag.objects.bulk_create(
+        [
+            Tag(name=f'{prefix} тег {i}', slug=f'{prefix}-tag-{i}')
+            for i in range(tags)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        [
+            Ingredient(
+                name=f'{prefix} ингредиент {i}',
+                measurement_unit=rng.choice(MEASUREMENT_UNITS),
+            )
+            for i in range(ingredients)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    recipe_objs = Recipe.objects.bulk_create(
+        [
+            Recipe(
+                author=rng.choice(user_objs),
+                name=f'{prefix} рецепт {i}',
+                text='Описание рецепта. ' * rng.randint(5, 40),
+                cooking_time=rng.randint(5, 180),
+                image=BENCHMARK_IMAGE,
+            )
+            for i in range(recipes)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    recipe_tags = []
+    recipe_ingredients = []
+    for recipe in recipe_objs:
+        for tag in _sample(rng, tag_objs, *tags_per_recipe):
+            recipe_tags.append(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+            )
+        for ingredient in _sample(
+            rng, ingredient_objs, *ingredients_per_recipe
+        ):
+            recipe_ingredients.append(
+                IngredientInRecipe(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    amount=rng.randint(1, 500),
+                )
+            )
+    Recipe.tags.through.objects.bulk_create(
+        recipe_tags, batch_size=BATCH_SIZE
+    )
+    IngredientInRecipe.objects.bulk_create(
+        recipe_ingredients, batch_size=BATCH_SIZE
+    )
+
+    popular_recipes = rng.sample(recipe_objs, len(recipe_objs))
+    recipe_weights = _popularity(len(recipe_objs), popularity_exponent)
+    popular_authors = rng.sample(user_objs, len(user_objs))
+    author_weights = _popularity(len(user_objs), popularity_exponent)
+    favorites = []
+    carts = []
+    subscriptions = []
+    for user in user_objs:
+        for recipe in _sample_popular(
+            rng, popular_recipes, recipe_weights, 0, favorites_per_user
+        ):
+            favorites.append(Favorite(user=user, recipe=recipe))
+        for recipe in _sample_popular(
+            rng, popular_recipes, recipe_weights, 0, carts_per_user
+        ):
+            carts.append(ShoppingCart(user=user, recipe=recipe))
+        for author in _sample_popular(
+            rng, popular_authors, author_weights, 0, subscriptions_per_user
+        ):
+            if author is not user:
+                subscriptions.append(Subscription(user=user, author=author))
+    Favorite.objects.bulk_create(favorites, batch_size=BATCH_SIZE)
+    ShoppingCart.objects.bulk_create(carts, batch_size=BATCH_SIZE)
+    Subscription.objects.bulk_create(subscriptions, batch_size=BATCH_SIZE)
+    rebuild_counters()
+    rebuild_shopping_lists()
+
+    return {
+        'users': len(user_objs),
+        'tags': len(tag_objs),
+        'ingredients': len(ingredient_objs),
+        'recipes': len(recipe_objs),
+        'ingredients_in_recipes': len(recipe_ingredients),
+        'favorites': len(favorites),
+        'carts': len(carts),
+        'subscriptions': len(subscriptions),
+    }
+
+
+def prepare_viewer(prefix='bench', favorites=30, carts=10,
+                   subscriptions=30):
+    """
+    Готовит пользователя, от имени которого идут авторизованные замеры:
+    гарантирует ему избранное, корзину и подписки и выдаёт токен.
+    """
+    viewer = User.objects.filter(username__startswith=prefix).order_by(
+        'pk'
+    ).first()
+    recipes = list(
+        Recipe.objects.exclude(author=viewer)
+        .exclude(in_carts__user=viewer)
+        .order_by('-pk')[:favorites + carts]
+    )
+    Favorite.objects.bulk_create(
+        [Favorite(user=viewer, recipe=r) for r in recipes[:favorites]],
+        ignore_conflicts=True,
+    )
+    ShoppingCart.objects.bulk_create(
+        [ShoppingCart(user=viewer, recipe=r) for r in recipes[-carts:]]
+    )
+    authors = User.objects.exclude(pk=viewer.pk).filter(
+        recipes__isnull=False
+    ).distinct().order_by('pk')[:subscriptions]
+    Subscription.objects.bulk_create(
+        [Subscription(user=viewer, author=a) for a in authors],
+        ignore_conflicts=True,
+    )
+    rebuild_counters()
+    rebuild_shopping_lists()
+    token, _ = Token.objects.get_or_create(user=viewer)
+    return viewer, token.key
+
+
+def reset_caches():
+    """
+    Сбрасывает кэши, которые обычно сбрасывают сигналы: справочники
+    тегов и ингредиентов и кэш ответов общей ленты и профилей.
+    """
+    reset_tag_registry()
+    TAGS_CATALOGUE.bump()
+    INGREDIENTS_CATALOGUE.bump()
+    invalidate([ALL_RECIPES, AUTHORS])
@@ -0,0 +1,255 @@
+"""
+Нагрузочный прогон смешанного трафика против запущенного сервера.
+
+Смесь запросов описана сценариями с весами. Сценарий — один или
+несколько шагов (например, добавить в избранное и убрать обратно),
+шаги после неуспешного ответа не выполняются, поэтому прогон
+не меняет данные. Подстановки в путях берутся из контекста, который
+собирает build_context по данным в БД.
+"""
+import math
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+import requests
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from tags.models import Tag
+
+User = get_user_model()
+
+ANY = 'any'
+AUTHENTICATED = 'user'
+
+# (вес, кто отправляет, шаги (маршрут, метод, шаблон пути))
+SCENARIOS = (
+    (30, ANY, (
+        ('recipes-list', 'get', '/api/recipes/?page={page}&limit={limit}'),
+    )),
+    (8, ANY, (
+        ('recipes-list-tags', 'get', '/api/recipes/?tags={tag}&page={page}'),
+    )),
+    (5, ANY, (
+        ('recipes-list-author', 'get', '/api/recipes/?author={author}'),
+    )),
+    (4, ANY, (('recipes-search', 'get', '/api/recipes/?search={search}'),)),
+    (20, ANY, (('recipes-detail', 'get', '/api/recipes/{recipe}/'),)),
+    (5, ANY, (('tags-list', 'get', '/api/tags/'),)),
+    (6, ANY, (
+        ('ingredients-search', 'get', '/api/ingredients/?name={ingredient}'),
+    )),
+    (3, ANY, (('users-detail', 'get', '/api/users/{author}/'),)),
+    (4, AUTHENTICATED, (('users-me', 'get', '/api/users/me/'),)),
+    (5, AUTHENTICATED, (
+        (
+            'users-subscriptions', 'get',
+            '/api/users/subscriptions/?recipes_limit=3',
+        ),
+    )),
+    (4, AUTHENTICATED, (('recipes-feed', 'get', '/api/recipes/feed/'),)),
+    (5, AUTHENTICATED, (
+        ('recipes-list-favorited', 'get', '/api/recipes/?is_favorited=1'),
+    )),
+    (2, AUTHENTICATED, (
+        (
+            'recipes-download-shopping-cart', 'get',
+            '/api/recipes/download_shopping_cart/',
+        ),
+    )),
+    (3, AUTHENTICATED, (
+        ('recipes-favorite-add', 'post', '/api/recipes/{recipe}/favorite/'),
+        (
+            'recipes-favorite-remove', 'delete',
+            '/api/recipes/{recipe}/favorite/',
+        ),
+    )),
+    (2, AUTHENTICATED, (
+        (
+            'recipes-shopping-cart-add', 'post',
+            '/api/recipes/{recipe}/shopping_cart/',
+        ),
+        (
+            'recipes-shopping-cart-remove', 'delete',
+            '/api/recipes/{recipe}/shopping_cart/',
+        ),
+    )),
+    (1, AUTHENTICATED, (
+        ('users-subscribe', 'post', '/api/users/{author}/subscribe/'),
+        ('users-unsubscribe', 'delete', '/api/users/{author}/subscribe/'),
+    )),
+)
+
+PAGE_SIZE = 6
+SAMPLE_SIZE = 2000
+
+
+def build_context(users=50, seed=0):
+    """
+    Выбирает из БД рецепты, авторов, теги, ингредиенты и слова для
+    поиска, а также токены users пользователей для авторизованных
+    запросов (недостающие токены создаются).
+    """
+    rng = random.Random(seed)
+    recipe_ids = list(Recipe.objects.values_list('pk', flat=True))
+    recipes = rng.sample(recipe_ids, min(len(recipe_ids), SAMPLE_SIZE))
+    names = Recipe.objects.filter(pk__in=recipes[:200]).values_list(
+        'name', flat=True
+    )
+    authors = User.objects.filter(recipes_count__gt=0).values_list(
+        'pk', flat=True
+    )
+    viewers = User.objects.filter(is_active=True).order_by('pk')[:users]
+    return {
+        'recipe': recipes,
+        'author': list(authors[:SAMPLE_SIZE]),
+        'tag': list(Tag.objects.values_list('slug', flat=True)),
+        'ingredient': sorted({
+            name[:3] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:SAMPLE_SIZE]
+        }),
+        'search': sorted({
+            word for name in names for word in name.split() if len(word) > 3
+        }),
+        'pages': max(1, math.ceil(len(recipe_ids) / PAGE_SIZE)),
+        'tokens': [
+            Token.objects.get_or_create(user=user)[0].key
+            for user in viewers
+        ],
+    }
+
+
+def is_write(scenario):
+    return any(method != 'get' for _, method, _ in scenario[2])
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу; values должны быть отсортированы."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(share * len(values)))
+    return values[rank - 1]
+
+
+class LoadTest:
+    def __init__(self, base_url, context, concurrency=8, auth_share=0.3,
+                 seed=0, timeout=30, reads_only=False):
+        self.base_url = base_url.rstrip('/')
+        self.context = context
+        self.concurrency = concurrency
+        self.auth_share = auth_share if context['tokens'] else 0
+        self.seed = seed
+        self.timeout = timeout
+        self.scenarios = [
+            scenario for scenario in SCENARIOS
+            if (scenario[1] == ANY or context['tokens'])
+            and not (reads_only and is_write(scenario))
+        ]
+        self.weights = [scenario[0] for scenario in self.scenarios]
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def substitutions(self, rng):
+        context = self.context
+        return {
+            'page': rng.randint(1, min(context['pages'], 50)),
+            'limit': PAGE_SIZE,
+            'recipe': rng.choice(context['recipe']),
+            'author': rng.choice(context['author']),
+            'tag': quote(rng.choice(context['tag'])),
+            'ingredient': quote(rng.choice(context['ingredient'])),
+            'search': quote(rng.choice(context['search'] or ['рецепт'])),
+        }
+
+    def run_scenario(self, session, rng, record):
+        _, who, steps = rng.choices(self.scenarios, weights=self.weights)[0]
+        headers = {}
+        if who == AUTHENTICATED or rng.random() < self.auth_share:
+            token = rng.choice(self.context['tokens'])
+            headers['Authorization'] = f'Token {token}'
+        values = self.substitutions(rng)
+        for route, method, template in steps:
+            url = self.base_url + template.format(**values)
+            started = time.perf_counter()
+            try:
+                response = session.request(
+                    method, url, headers=headers, timeout=self.timeout
+                )
+            except requests.RequestException:
+                if record:
+                    with self.lock:
+                        self.errors[route] += 1
+                return
+            elapsed = (time.perf_counter() - started) * 1000
+            if record:
+                with self.lock:
+                    self.latencies[route].append(elapsed)
+                    self.statuses[route][response.status_code] += 1
+                    if response.status_code >= 500:
+                        self.errors[route] += 1
+            if response.status_code >= 300:
+                return
+
+    def worker(self, number, warmup_until, deadline):
+        rng = random.Random(self.seed * 1000 + number)
+        with requests.Session() as session:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return
+                self.run_scenario(session, rng, record=now >= warmup_until)
+
+    def run(self, duration, warmup=0):
+        started = time.monotonic()
+        warmup_until = started + warmup
+        deadline = warmup_until + duration
+        threads = [
+            threading.Thread(
+                target=self.worker, args=(n, warmup_until, deadline)
+            )
+            for n in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(duration)
+
+    def report(self, duration):
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[route])
+            routes[route] = {
+                'requests': len(values),
+                'rps': round(len(values) / duration, 2),
+                'p50_ms': _round(percentile(values, 0.50)),
+                'p95_ms': _round(percentile(values, 0.95)),
+                'p99_ms': _round(percentile(values, 0.99)),
+                'mean_ms': _round(statistics.mean(values) if values else None),
+                'errors': self.errors[route],
+                'statuses': {
+                    str(code): count
+                    for code, count in sorted(self.statuses[route].items())
+                },
+            }
+        total = sum(route['requests'] for route in routes.values())
+        return {
+            'duration_s': duration,
+            'concurrency': self.concurrency,
+            'requests': total,
+            'rps': round(total / duration, 2),
+            'routes': routes,
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
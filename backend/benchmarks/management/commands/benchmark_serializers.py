@@ -0,0 +1,150 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.dataset import generate_dataset, prepare_viewer
+from foodgram.asynchrony import drf_request
+from foodgram.renderers import FastJSONRenderer, orjson
+from recipes.models import Recipe
+from recipes.serializers import RecipeListReadSerializer, RecipeListSerializer
+from recipes.views import RecipeViewSet
+
+# Строки, на которых JSON-кодировщики чаще всего расходятся.
+TRICKY_TEXT = 'Щи «по-домашнему»\u2028\u2029"кавычки" \\ \t 😀 \x7f'
+# (имя, сериализатор, рендерер)
+VARIANTS = (
+    ('drf', RecipeListSerializer, JSONRenderer),
+    ('plain', RecipeListReadSerializer, JSONRenderer),
+    ('plain+fast', RecipeListReadSerializer, FastJSONRenderer),
+)
+CHECK_PAGE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет тестовую БД синтетическими данными, сверяет побайтно '
+        'ответы списка рецептов через RecipeListSerializer и '
+        'JSONRenderer с RecipeListReadSerializer и FastJSONRenderer '
+        'для всех рецептов и замеряет время сериализации и рендеринга '
+        'одной страницы для каждого варианта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--page-sizes', type=int, nargs='+', default=[6, 24, 100],
+        )
+        parser.add_argument(
+            '--report', help='Сохранить замеры в JSON-файл.',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            generate_dataset(
+                prefix='bench', users=options['users'],
+                recipes=options['recipes'], seed=options['seed'],
+            )
+            viewer, _ = prepare_viewer(prefix='bench')
+            self.add_tricky_text(viewer)
+            requests = {
+                'anon': drf_request(self.request(), AnonymousUser()),
+                'user': drf_request(self.request(), viewer),
+            }
+            self.check_equivalence(requests)
+            report = self.measure(requests, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        if options['report']:
+            Path(options['report']).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+
+    def request(self):
+        return APIRequestFactory().get('/api/recipes/')
+
+    def add_tricky_text(self, viewer):
+        recipe = Recipe.objects.exclude(author=viewer).order_by('-pk').first()
+        Recipe.objects.filter(pk=recipe.pk).update(
+            name=TRICKY_TEXT, text=TRICKY_TEXT
+        )
+        author = recipe.author
+        author.first_name = TRICKY_TEXT
+        author.save(update_fields=['first_name'])
+
+    def page(self, request, offset, size):
+        return list(
+            RecipeViewSet.queryset.with_user_flags(request.user)
+            [offset:offset + size]
+        )
+
+    def render(self, variant, recipes, request):
+        _, serializer_class, renderer_class = variant
+        data = serializer_class(
+            recipes, many=True, context={'request': request}
+        ).data
+        return renderer_class().render(data)
+
+    def check_equivalence(self, requests):
+        reference, *others = VARIANTS
+        total = Recipe.objects.count()
+        for viewer_kind, request in requests.items():
+            for offset in range(0, total, CHECK_PAGE):
+                recipes = self.page(request, offset, CHECK_PAGE)
+                expected = self.render(reference, recipes, request)
+                for variant in others:
+                    if self.render(variant, recipes, request) != expected:
+                        raise CommandError(
+                            f'{variant[0]} ({viewer_kind}): ответ '
+                            f'рецептов {offset}–{offset + CHECK_PAGE} '
+                            f'отличается от {reference[0]}.'
+                        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ответы совпадают побайтно: {total} рецептов, '
+            f'{len(requests)} вида пользователей.'
+        ))
+
+    def measure(self, requests, options):
+        if orjson is None:
+            self.stdout.write(
+                'orjson не установлен: FastJSONRenderer работает '
+                'через стандартный json.'
+            )
+        report = []
+        for viewer_kind, request in requests.items():
+            for size in options['page_sizes']:
+                recipes = self.page(request, 0, size)
+                row = {'viewer': viewer_kind, 'page_size': size}
+                for variant in VARIANTS:
+                    self.render(variant, recipes, request)
+                    timings = []
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        self.render(variant, recipes, request)
+                        timings.append(time.perf_counter() - started)
+                    row[variant[0]] = statistics.median(timings) * 1000
+                report.append(row)
+                self.stdout.write(
+                    f'{viewer_kind:<5} page={size:<4} ' + ' '.join(
+                        f'{name}={row[name]:.2f}ms'
+                        for name, _, _ in VARIANTS
+                    ) + f' ускорение x{row["drf"] / row["plain+fast"]:.1f}'
+                )
+        return report
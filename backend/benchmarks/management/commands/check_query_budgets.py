@@ -0,0 +1,171 @@
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from benchmarks.dataset import generate_dataset, prepare_viewer
+from benchmarks.probes import (LARGE_PAGE, ROUTES, SMALL_PAGE, VIEWERS,
+                               build_context, run_probes,
+                               shopping_list_errors)
+
+BUDGETS_FILE = Path(__file__).resolve().parents[2] / 'query_budgets.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет тестовую БД синтетическими данными, прогоняет все '
+        'маршруты API анонимно и с авторизацией и сверяет число '
+        'SQL-запросов с бюджетами из query_budgets.json. Завершается '
+        'с ошибкой, если бюджет превышен или число запросов растёт '
+        'вместе с размером страницы или объёмом данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--budgets', default=str(BUDGETS_FILE),
+            help='Файл с бюджетами запросов.',
+        )
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Записать текущие значения в файл бюджетов.',
+        )
+        parser.add_argument(
+            '--report',
+            help='Сохранить полный отчёт о замерах в JSON-файл.',
+        )
+
+    def handle(self, *args, **options):
+        # Ответы 401/404 для анонима ожидаемы и не должны засорять вывод.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        # Файлы, которые сохраняют маршруты на запись, не откатываются
+        # вместе с транзакцией: пусть остаются во временном каталоге.
+        # Замеры идут в одном процессе, поэтому кэш любого типа ведёт
+        # себя как общий; считаем как в рабочей конфигурации.
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root,
+                                      SHARED_CACHE=True):
+                report = self.collect(options)
+                consistency_errors = shopping_list_errors(self.token)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['report']:
+            Path(options['report']).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+        budgets_path = Path(options['budgets'])
+        if options['update']:
+            self.write_budgets(budgets_path, report)
+            return
+        errors = consistency_errors + self.check_budgets(
+            report, self.read_budgets(budgets_path)
+        )
+        if errors:
+            raise CommandError(
+                'Нарушены бюджеты SQL-запросов или согласованность '
+                'данных:\n' + '\n'.join(errors)
+            )
+        self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены.'))
+
+    def collect(self, options):
+        sizes = {
+            'users': options['users'],
+            'recipes': options['recipes'],
+            'seed': options['seed'],
+        }
+        generate_dataset(prefix='bench', **sizes)
+        viewer, token = prepare_viewer(prefix='bench')
+        self.token = token
+        context = build_context(viewer)
+        repeat = options['repeat']
+
+        base = run_probes(token, context, SMALL_PAGE, repeat)
+        large_page = run_probes(token, context, LARGE_PAGE, 1)
+        generate_dataset(prefix='bench2', **sizes)
+        large_data = run_probes(token, context, SMALL_PAGE, 1)
+
+        report = []
+        for name, _, _, paginated in ROUTES:
+            for viewer_kind in VIEWERS:
+                key = (name, viewer_kind)
+                row = dict(base[key], route=name, viewer=viewer_kind)
+                row['queries_large_page'] = (
+                    large_page[key]['queries'] if paginated else None
+                )
+                row['queries_large_data'] = large_data[key]['queries']
+                report.append(row)
+                self.stdout.write(
+                    f'{name:<32} {viewer_kind:<5} {row["status"]:>4} '
+                    f'queries={row["queries"]:<4} '
+                    f'sql={row["sql_ms"]:>8.2f}ms '
+                    f'wall={row["wall_ms"]:>8.2f}ms'
+                )
+        return report
+
+    def read_budgets(self, path):
+        if not path.exists():
+            raise CommandError(
+                f'Файл бюджетов {path} не найден, запустите с --update.'
+            )
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    def write_budgets(self, path, report):
+        previous = self.read_budgets(path) if path.exists() else {}
+        budgets = {}
+        for row in report:
+            budgets.setdefault(row['route'], {})[row['viewer']] = (
+                row['queries']
+            )
+        for route, entry in budgets.items():
+            if previous.get(route, {}).get('allow_growth'):
+                entry['allow_growth'] = True
+        path.write_text(
+            json.dumps(budgets, ensure_ascii=False, indent=2) + '\n',
+            encoding='utf-8',
+        )
+        self.stdout.write(self.style.SUCCESS(f'Бюджеты записаны в {path}'))
+
+    def check_budgets(self, report, budgets):
+        errors = []
+        for row in report:
+            route, viewer = row['route'], row['viewer']
+            label = f'{route} ({viewer})'
+            budget = budgets.get(route, {})
+            if viewer not in budget:
+                errors.append(f'{label}: бюджет не задан')
+                continue
+            if row['queries'] > budget[viewer]:
+                errors.append(
+                    f'{label}: {row["queries"]} запросов '
+                    f'при бюджете {budget[viewer]}'
+                )
+            if budget.get('allow_growth'):
+                continue
+            large_page = row['queries_large_page']
+            if large_page is not None and large_page > row['queries']:
+                errors.append(
+                    f'{label}: число запросов зависит от размера страницы '
+                    f'({row["queries"]} → {large_page})'
+                )
+            if row['queries_large_data'] > row['queries']:
+                errors.append(
+                    f'{label}: число запросов зависит от объёма данных '
+                    f'({row["queries"]} → {row["queries_large_data"]})'
+                )
+        return errors
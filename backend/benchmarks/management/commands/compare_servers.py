@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from .load_test import Command as LoadTestCommand
+from benchmarks.load import LoadTest, build_context
+
+# (имя, приложение, класс воркера gunicorn)
+SERVERS = (
+    ('wsgi', 'foodgram.wsgi:application', 'sync'),
+    ('asgi', 'foodgram.asgi:application', 'uvicorn.workers.UvicornWorker'),
+)
+START_TIMEOUT = 30
+
+
+class Command(LoadTestCommand):
+    help = (
+        'Запускает проект в gunicorn поочерёдно как WSGI и как ASGI '
+        '(воркеры uvicorn), прогоняет одинаковую нагрузку и сравнивает '
+        'пропускную способность и задержки p50/p95/p99 по маршрутам.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(concurrency=64, url='http://127.0.0.1:8100')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число воркеров gunicorn у каждого сервера.',
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            raise CommandError('--compare здесь не используется.')
+        context = build_context(users=options['users'], seed=options['seed'])
+        if not context['recipe'] or not context['author']:
+            raise CommandError(
+                'В БД нет рецептов, сначала выполните generate_dataset.'
+            )
+        reports = {}
+        for name, app, worker_class in SERVERS:
+            self.stdout.write(f'Сервер {name} ({app})...')
+            with self.server(options, app, worker_class):
+                reports[name] = LoadTest(
+                    options['url'], context,
+                    concurrency=options['concurrency'],
+                    auth_share=options['auth_share'],
+                    seed=options['seed'],
+                    reads_only=options['reads_only'],
+                ).run(options['duration'], options['warmup'])
+        self.stdout.write('ASGI против WSGI:')
+        self.print_report(reports['asgi'], reports['wsgi'])
+        if options['report']:
+            Path(options['report']).write_text(
+                json.dumps(reports, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+
+    @contextmanager
+    def server(self, options, app, worker_class):
+        bind = options['url'].split('://', 1)[-1].rstrip('/')
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', app,
+                '--bind', bind,
+                '--workers', str(options['workers']),
+                '--worker-class', worker_class,
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=dict(
+                os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE
+            ),
+        )
+        try:
+            self.wait_ready(options['url'], process)
+            yield process
+        finally:
+            process.terminate()
+            process.wait()
+
+    def wait_ready(self, url, process):
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('Сервер завершился при запуске.')
+            try:
+                requests.get(f'{url}/api/tags/', timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f'Сервер не ответил за {START_TIMEOUT} с.')
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.dataset import generate_dataset, reset_caches
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет текущую БД воспроизводимым синтетическим набором '
+        'данных: пользователи, рецепты с тегами и ингредиентами, подписки, '
+        'избранное и корзины со степенным распределением популярности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=12)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--favorites-per-user', type=int, default=30)
+        parser.add_argument('--carts-per-user', type=int, default=8)
+        parser.add_argument('--subscriptions-per-user', type=int, default=20)
+        parser.add_argument(
+            '--popularity-exponent', type=float, default=1.1,
+            help='Крутизна степенного закона популярности; 0 — равномерно.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(
+                f'Данные с префиксом «{prefix}» уже есть, '
+                'укажите другой --prefix.'
+            )
+        counts = generate_dataset(
+            prefix=prefix,
+            users=options['users'],
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            favorites_per_user=options['favorites_per_user'],
+            carts_per_user=options['carts_per_user'],
+            subscriptions_per_user=options['subscriptions_per_user'],
+            popularity_exponent=options['popularity_exponent'],
+            seed=options['seed'],
+        )
+        reset_caches()
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: ' + ', '.join(
+                f'{name} {count}' for name, count in counts.items()
+            ) + '.'
+        ))
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.load import LoadTest, build_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер смешанным трафиком по маршрутам '
+        'рецептов и пользователей и выводит пропускную способность '
+        'и задержки p50/p95/p99 по каждому маршруту. Данные для путей '
+        'и токены берутся из текущей БД (см. generate_dataset).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://127.0.0.1:8000',
+            help='Адрес сервера.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность замера в секундах.',
+        )
+        parser.add_argument(
+            '--warmup', type=float, default=5,
+            help='Прогрев в секундах, не входит в замер.',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--users', type=int, default=50,
+            help='Сколько пользователей отправляют авторизованные запросы.',
+        )
+        parser.add_argument(
+            '--auth-share', type=float, default=0.3,
+            help='Доля авторизованных среди общих запросов.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--reads-only', action='store_true',
+            help='Только сценарии чтения, без добавления и удаления.',
+        )
+        parser.add_argument(
+            '--report', help='Сохранить отчёт в JSON-файл.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Отчёт предыдущего прогона для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        context = build_context(users=options['users'], seed=options['seed'])
+        if not context['recipe'] or not context['author']:
+            raise CommandError(
+                'В БД нет рецептов, сначала выполните generate_dataset.'
+            )
+        previous = None
+        if options['compare']:
+            previous = json.loads(
+                Path(options['compare']).read_text(encoding='utf-8')
+            )
+        load_test = LoadTest(
+            options['url'], context,
+            concurrency=options['concurrency'],
+            auth_share=options['auth_share'],
+            seed=options['seed'],
+            reads_only=options['reads_only'],
+        )
+        report = load_test.run(options['duration'], options['warmup'])
+        self.print_report(report, previous)
+        if options['report']:
+            Path(options['report']).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+
+    def print_report(self, report, previous=None):
+        old_routes = previous['routes'] if previous else {}
+        self.stdout.write(
+            f'{"маршрут":34} {"запросов":>8} {"rps":>8} {"p50":>8} '
+            f'{"p95":>8} {"p99":>8} {"ошибок":>6}'
+            + ('  Δrps    Δp95' if previous else '')
+        )
+        for route, stats in report['routes'].items():
+            line = (
+                f'{route:34} {stats["requests"]:>8} {stats["rps"]:>8} '
+                f'{_ms(stats["p50_ms"])} {_ms(stats["p95_ms"])} '
+                f'{_ms(stats["p99_ms"])} {stats["errors"]:>6}'
+            )
+            old = old_routes.get(route)
+            if old:
+                line += (
+                    f' {_change(stats["rps"], old["rps"])}'
+                    f' {_change(stats["p95_ms"], old["p95_ms"])}'
+                )
+            self.stdout.write(line)
+        summary = (
+            f'Всего: {report["requests"]} запросов, '
+            f'{report["rps"]} в секунду'
+        )
+        if previous:
+            summary += f' ({_change(report["rps"], previous["rps"])})'
+        self.stdout.write(self.style.SUCCESS(summary + '.'))
+
+
+def _ms(value):
+    return f'{value:>8.1f}' if value is not None else f'{"—":>8}'
+
+
+def _change(new, old):
+    if not old or new is None:
+        return f'{"—":>7}'
+    return f'{(new - old) / old:>+7.1%}'
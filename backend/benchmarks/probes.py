@@ -0,0 +1,303 @@
+"""
+Прогон маршрутов API с подсчётом SQL-запросов и времени.
+
+Каждый маршрут описан шаблоном пути; подстановки и тела запросов на
+запись берутся из контекста, который собирает build_context по уже
+сгенерированным данным. Изменения, сделанные запросами, откатываются.
+"""
+import base64
+import io
+import json
+import statistics
+import time
+from urllib.parse import quote
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from benchmarks.dataset import BENCHMARK_PASSWORD
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from recipes.shopping_list import shopping_list_mismatches
+from recipes.shortlinks import get_or_create_link
+from users.authentication import CachedTokenAuthentication
+from tags.models import Tag
+from users.models import Subscription
+
+ANONYMOUS = 'anon'
+AUTHENTICATED = 'user'
+VIEWERS = (ANONYMOUS, AUTHENTICATED)
+
+SMALL_PAGE = 6
+LARGE_PAGE = 60
+RECIPE_INGREDIENTS = 10
+
+# (имя, метод, шаблон пути, постраничный ли маршрут)
+ROUTES = (
+    ('recipes-list', 'get', '/api/recipes/?limit={limit}', True),
+    (
+        'recipes-list-filtered', 'get',
+        '/api/recipes/?limit={limit}&tags={tag}&author={author}', True,
+    ),
+    (
+        'recipes-list-favorited', 'get',
+        '/api/recipes/?limit={limit}&is_favorited=1', True,
+    ),
+    (
+        'recipes-list-in-cart', 'get',
+        '/api/recipes/?limit={limit}&is_in_shopping_cart=1', True,
+    ),
+    (
+        'recipes-list-cursor', 'get',
+        '/api/recipes/?limit={limit}&tags={tag}&cursor=', True,
+    ),
+    (
+        'recipes-search', 'get',
+        '/api/recipes/?limit={limit}&search={search}', True,
+    ),
+    ('recipes-feed', 'get', '/api/recipes/feed/?limit={limit}', True),
+    ('recipes-detail', 'get', '/api/recipes/{recipe}/', False),
+    ('recipes-get-link', 'get', '/api/recipes/{recipe}/get-link/', False),
+    ('short-link-redirect', 'get', '/s/{short_code}/', False),
+    (
+        'recipes-download-shopping-cart', 'get',
+        '/api/recipes/download_shopping_cart/', False,
+    ),
+    ('recipes-favorite', 'post', '/api/recipes/{other_recipe}/favorite/',
+     False),
+    (
+        'recipes-shopping-cart', 'post',
+        '/api/recipes/{other_recipe}/shopping_cart/', False,
+    ),
+    ('tags-list', 'get', '/api/tags/', False),
+    ('tags-detail', 'get', '/api/tags/{tag_id}/', False),
+    ('ingredients-list', 'get', '/api/ingredients/', False),
+    (
+        'ingredients-search', 'get',
+        '/api/ingredients/?name={ingredient_prefix}', False,
+    ),
+    ('ingredients-detail', 'get', '/api/ingredients/{ingredient}/', False),
+    ('users-list', 'get', '/api/users/?limit={limit}', True),
+    ('users-detail', 'get', '/api/users/{author}/', False),
+    ('users-me', 'get', '/api/users/me/', False),
+    (
+        'users-subscriptions', 'get',
+        '/api/users/subscriptions/?limit={limit}&recipes_limit=3', True,
+    ),
+    (
+        'users-subscriptions-cursor', 'get',
+        '/api/users/subscriptions/?limit={limit}&recipes_limit=3&cursor=',
+        True,
+    ),
+    ('users-subscribe', 'post', '/api/users/{other_author}/subscribe/',
+     False),
+    ('recipes-create', 'post', '/api/recipes/', False),
+    ('recipes-update', 'patch', '/api/recipes/{own_recipe}/', False),
+    ('recipes-delete', 'delete', '/api/recipes/{own_recipe}/', False),
+    ('users-create', 'post', '/api/users/', False),
+    ('users-set-password', 'post', '/api/users/set_password/', False),
+    ('users-avatar', 'put', '/api/users/me/avatar/', False),
+    ('users-avatar-delete', 'delete', '/api/users/me/avatar/', False),
+    ('token-login', 'post', '/api/auth/token/login/', False),
+    ('token-logout', 'post', '/api/auth/token/logout/', False),
+)
+# Тела запросов на запись: маршрут → ключ контекста.
+ROUTE_BODIES = {
+    'recipes-create': 'recipe_body',
+    'recipes-update': 'recipe_update_body',
+    'users-create': 'user_body',
+    'users-set-password': 'password_body',
+    'users-avatar': 'avatar_body',
+    'token-login': 'login_body',
+}
+
+
+def image_base64(size=(8, 8)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def recipe_body(ingredient_ids, tag_ids, image=None):
+    body = {
+        'ingredients': [
+            {'id': pk, 'amount': amount}
+            for amount, pk in enumerate(ingredient_ids, start=1)
+        ],
+        'tags': tag_ids,
+        'name': 'Замер',
+        'text': 'Рецепт для замера запросов.',
+        'cooking_time': 10,
+    }
+    if image is not None:
+        body['image'] = image
+    return body
+
+
+def build_context(viewer):
+    """Подбирает объекты, которые подставляются в шаблоны путей."""
+    recipe = Recipe.objects.exclude(author=viewer).order_by('-pk').first()
+    other_recipe = (
+        Recipe.objects.exclude(author=viewer)
+        .exclude(favorited_by__user=viewer)
+        .exclude(in_carts__user=viewer)
+        .order_by('pk')
+        .first()
+    )
+    followed = Subscription.objects.filter(user=viewer).values('author')
+    other_author = (
+        Recipe.objects.exclude(author=viewer)
+        .exclude(author__in=followed)
+        .values_list('author', flat=True)
+        .order_by('author')
+        .first()
+    )
+    tag = recipe.tags.order_by('pk').first()
+    ingredient = recipe.ingredients.select_related('ingredient').first()
+    own_recipe = Recipe.objects.filter(author=viewer).order_by('pk').first()
+    ingredient_ids = list(
+        Ingredient.objects.order_by('pk')
+        .values_list('pk', flat=True)[:RECIPE_INGREDIENTS * 2]
+    )
+    tag_ids = list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+    image = image_base64()
+    return {
+        'recipe': recipe.pk,
+        'short_code': get_or_create_link(recipe.pk),
+        'other_recipe': other_recipe.pk,
+        'author': recipe.author_id,
+        'other_author': other_author,
+        'tag': tag.slug,
+        'search': quote(recipe.name.split()[0]),
+        'tag_id': tag.pk,
+        'ingredient': ingredient.ingredient_id,
+        'ingredient_prefix': ingredient.ingredient.name[:3],
+        'own_recipe': own_recipe.pk,
+        'recipe_body': recipe_body(
+            ingredient_ids[:RECIPE_INGREDIENTS], tag_ids[:2], image
+        ),
+        # Замена всех ингредиентов и одного тега.
+        'recipe_update_body': recipe_body(
+            ingredient_ids[RECIPE_INGREDIENTS:], tag_ids[1:3]
+        ),
+        'user_body': {
+            'email': 'probe@example.com',
+            'username': 'probe',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': 'probe-password-1',
+        },
+        'password_body': {
+            'current_password': BENCHMARK_PASSWORD,
+            'new_password': 'probe-password-2',
+        },
+        'avatar_body': {'avatar': image},
+        'login_body': {
+            'email': viewer.email, 'password': BENCHMARK_PASSWORD,
+        },
+    }
+
+
+def clear_caches(token=None):
+    """
+    Очищает кэши. Если передан token, сразу заново кэширует его
+    аутентификацию: в работе она почти всегда берётся из кэша.
+    """
+    for cache in caches.all():
+        cache.clear()
+    if token is not None:
+        CachedTokenAuthentication().authenticate_credentials(token)
+
+
+def measure(client, method, path, repeat=1, body=None):
+    """
+    Выполняет запрос repeat раз, с телом body в JSON, если оно есть.
+    Число запросов к БД берётся из первого (холодного) прогона,
+    время — медиана по всем прогонам. Изменения данных, сделанные
+    запросом, откатываются.
+    """
+    kwargs = {} if body is None else {
+        'data': json.dumps(body), 'content_type': 'application/json',
+    }
+    queries = None
+    sql_times = []
+    wall_times = []
+    status_code = None
+    for _ in range(repeat):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                wall_times.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+        if queries is None:
+            queries = len(ctx.captured_queries)
+            status_code = response.status_code
+        sql_times.append(
+            sum(float(q['time']) for q in ctx.captured_queries)
+        )
+    return {
+        'status': status_code,
+        'queries': queries,
+        'sql_ms': round(statistics.median(sql_times) * 1000, 2),
+        'wall_ms': round(statistics.median(wall_times) * 1000, 2),
+    }
+
+
+def run_probes(token, context, limit=SMALL_PAGE, repeat=1):
+    """
+    Прогоняет все маршруты от имени анонима и авторизованного
+    пользователя. Возвращает {(маршрут, зритель): замер}.
+    """
+    clients = {
+        ANONYMOUS: Client(),
+        AUTHENTICATED: Client(HTTP_AUTHORIZATION=f'Token {token}'),
+    }
+    results = {}
+    for name, method, template, _ in ROUTES:
+        path = template.format(limit=limit, **context)
+        for viewer in VIEWERS:
+            clear_caches(token if viewer == AUTHENTICATED else None)
+            body = context.get(ROUTE_BODIES.get(name))
+            results[(name, viewer)] = dict(
+                measure(
+                    clients[viewer], method, path, repeat=repeat, body=body
+                ),
+                path=path,
+            )
+    return results
+
+
+def shopping_list_errors(token):
+    """
+    Добавляет в корзину и убирает из неё рецепт, который уже лежит
+    в наибольшем числе корзин, и сверяет таблицу списков покупок
+    с суммами, посчитанными заново. Изменения откатываются.
+    """
+    viewer = Token.objects.get(key=token).user
+    recipe = (
+        Recipe.objects.exclude(in_carts__user=viewer)
+        .order_by('-in_carts_count', 'pk').first()
+    )
+    client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+    path = f'/api/recipes/{recipe.pk}/shopping_cart/'
+    errors = []
+    with transaction.atomic():
+        for method in ('post', 'delete'):
+            client.generic(method.upper(), path)
+            mismatches = shopping_list_mismatches()
+            if mismatches:
+                errors.append(
+                    f'{method.upper()} {path}: расхождений в списках '
+                    f'покупок {len(mismatches)}'
+                )
+        transaction.set_rollback(True)
+    return errors
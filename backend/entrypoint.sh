@@ -1,6 +1,15 @@
 #!/bin/sh
 set -e 
 export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:=foodgram.settings}"
-export GUNICORN_APP="${GUNICORN_APP:=foodgram.wsgi:application}"
 
-exec gunicorn "$GUNICORN_APP" --bind 0.0.0.0:8000
+# SERVER_INTERFACE=asgi запускает foodgram.asgi на воркерах uvicorn.
+if [ "${SERVER_INTERFACE:-wsgi}" = "asgi" ]; then
+    export GUNICORN_APP="${GUNICORN_APP:=foodgram.asgi:application}"
+    export GUNICORN_WORKER_CLASS="${GUNICORN_WORKER_CLASS:=uvicorn.workers.UvicornWorker}"
+else
+    export GUNICORN_APP="${GUNICORN_APP:=foodgram.wsgi:application}"
+    export GUNICORN_WORKER_CLASS="${GUNICORN_WORKER_CLASS:=sync}"
+fi
+
+exec gunicorn "$GUNICORN_APP" --bind 0.0.0.0:8000 \
+    --worker-class "$GUNICORN_WORKER_CLASS"
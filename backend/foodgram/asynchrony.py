@@ -0,0 +1,80 @@
+"""
+Асинхронные представления для развёртывания через ASGI.
+
+Частые чтения (списки и детали рецептов, справочники, подписки)
+обслуживаются быстрым путём на асинхронном кэше и ORM, не занимая
+поток. Всё, что быстрый путь не берётся обработать (промах кэша,
+ошибки, запись), уходит в прежнее синхронное представление DRF,
+так что ответы и поведение записи не меняются.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+
+def route_callback(urlpatterns, name):
+    """Синхронное представление маршрута name из urlpatterns роутера."""
+    for pattern in urlpatterns:
+        if getattr(pattern, 'name', None) == name:
+            return pattern.callback
+    raise LookupError(name)
+
+
+def accepts_json(request):
+    """Выберет ли DRF для запроса JSONRenderer."""
+    accept = request.META.get('HTTP_ACCEPT', '')
+    return 'format' not in request.GET and (
+        not accept or 'text/html' not in accept and (
+            'application/json' in accept or '*/*' in accept
+        )
+    )
+
+
+def drf_request(request, user):
+    """Обёртка DRF над запросом с уже известным пользователем."""
+    wrapped = Request(request)
+    wrapped.user = user
+    return wrapped
+
+
+def json_response(data):
+    return HttpResponse(
+        JSONRenderer().render(data), content_type='application/json'
+    )
+
+
+def allowed_methods(sync_view):
+    """Заголовок Allow, который DRF добавляет к ответам sync_view."""
+    methods = set(sync_view.actions) | {'options'}
+    if 'get' in methods:
+        methods.add('head')
+    return ', '.join(
+        method.upper() for method in View.http_method_names
+        if method in methods
+    )
+
+
+def async_read_view(sync_view, fast_path):
+    """
+    Асинхронное представление: GET сначала идёт в fast_path, который
+    возвращает ответ или None; остальное — в sync_view в отдельном
+    потоке. К ответам быстрого пути добавляются те же Allow и Vary,
+    что ставит DRF.
+    """
+    run_sync = sync_to_async(sync_view)
+    allow = allowed_methods(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            response = await fast_path(request, *args, **kwargs)
+            if response is not None:
+                response['Allow'] = allow
+                patch_vary_headers(response, ('Accept',))
+                return response
+        return await run_sync(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
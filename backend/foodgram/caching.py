@@ -0,0 +1,116 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .replicas import read_from_primary
+
+CATALOGUE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class CatalogueVersion:
+    """
+    Версия справочника в общем кэше. Значение — случайный токен, а не
+    счётчик: если ключ вытеснен из кэша, появится новая версия, и все
+    производные от неё кэши будут перестроены, а не прочитаны устаревшими.
+    Ключ живёт CACHE_VERSION_TIMEOUT секунд, поэтому пропущенный bump()
+    (изменение в обход сигналов) тоже исправится сам.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.cache_key = f'catalogue:{name}:version'
+
+    def get(self):
+        return cache.get_or_set(
+            self.cache_key, uuid.uuid4().hex, settings.CACHE_VERSION_TIMEOUT
+        )
+
+    async def aget(self):
+        version = await cache.aget(self.cache_key)
+        if version is None:
+            await cache.aadd(
+                self.cache_key, uuid.uuid4().hex,
+                settings.CACHE_VERSION_TIMEOUT,
+            )
+            version = await cache.aget(self.cache_key)
+        return version
+
+    def bump(self):
+        cache.set(
+            self.cache_key, uuid.uuid4().hex, settings.CACHE_VERSION_TIMEOUT
+        )
+
+
+def catalogue_etag(catalogue_version, version):
+    return quote_etag(f'{catalogue_version.name}-{version}')
+
+
+def catalogue_content_key(catalogue_version, version):
+    return f'catalogue:{catalogue_version.name}:{version}'
+
+
+def _if_none_match(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    return bool(if_none_match) and (
+        etag in parse_etags(if_none_match) or if_none_match == '*'
+    )
+
+
+def catalogue_response(content, etag, max_age):
+    """Ответ со списком справочника; content=None — ответ 304."""
+    if content is None:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+async def acached_catalogue_response(request, catalogue_version, max_age):
+    """
+    Асинхронный вариант CachedCatalogueListMixin.list: только кэш,
+    без БД. None, если отрендеренного списка в кэше нет.
+    """
+    version = await catalogue_version.aget()
+    etag = catalogue_etag(catalogue_version, version)
+    if _if_none_match(request, etag):
+        return catalogue_response(None, etag, max_age)
+    content = await cache.aget(
+        catalogue_content_key(catalogue_version, version)
+    )
+    if content is None:
+        return None
+    return catalogue_response(content, etag, max_age)
+
+
+class CachedCatalogueListMixin:
+    """
+    Отдаёт список справочника из кэша уже отрендеренным JSON, ключ
+    кэша — версия справочника. Ответ несёт ETag и Cache-Control, на
+    совпавший If-None-Match возвращается 304 без обращения к БД.
+    """
+    catalogue_version = None
+    catalogue_max_age = 60
+
+    def list(self, request, *args, **kwargs):
+        version = self.catalogue_version.get()
+        etag = catalogue_etag(self.catalogue_version, version)
+        if _if_none_match(request, etag):
+            content = None
+        else:
+            content_key = catalogue_content_key(
+                self.catalogue_version, version
+            )
+            content = cache.get(content_key)
+            if content is None:
+                with read_from_primary():
+                    data = super().list(request, *args, **kwargs).data
+                content = JSONRenderer().render(data)
+                cache.set(content_key, content, CATALOGUE_CACHE_TIMEOUT)
+        return catalogue_response(content, etag, self.catalogue_max_age)
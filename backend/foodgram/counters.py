@@ -0,0 +1,27 @@
+"""
+Денормализованные счётчики в моделях.
+
+Счётчики меняются только выражениями F() (см. recipes.counters).
+Обычное save() объекта не должно записывать их значения из памяти:
+иначе оно затрёт приращения, сделанные после загрузки объекта.
+"""
+
+
+class CounterFieldsMixin:
+    """Полное save() сохраняет все загруженные поля, кроме COUNTER_FIELDS."""
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
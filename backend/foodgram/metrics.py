@@ -0,0 +1,127 @@
+"""
+Гистограммы времени запросов по маршрутам в формате Prometheus.
+
+Гистограммы живут в памяти процесса: при нескольких воркерах каждый
+отдаёт свои значения, поэтому опрашивать нужно каждый воркер
+отдельно (по умолчанию gunicorn запускается с одним).
+"""
+import bisect
+import threading
+
+from django.http import HttpResponse
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# имя: (описание, границы корзин)
+METRICS = {
+    'foodgram_request_duration_seconds': (
+        'Полное время обработки запроса.', DURATION_BUCKETS,
+    ),
+    'foodgram_db_duration_seconds': (
+        'Суммарное время SQL-запросов за запрос.', DURATION_BUCKETS,
+    ),
+    'foodgram_db_queries': (
+        'Число SQL-запросов за запрос.', QUERY_BUCKETS,
+    ),
+    'foodgram_serialize_duration_seconds': (
+        'Время сериализации ответа в сериализаторах DRF.', DURATION_BUCKETS,
+    ),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, labels, values):
+        """
+        Добавляет наблюдения {метрика: значение} с общими метками
+        labels — кортежем пар (имя, значение).
+        """
+        with self.lock:
+            for name, value in values.items():
+                key = (name, labels)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(
+                        METRICS[name][1]
+                    )
+                histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        with self.lock:
+            snapshot = {
+                key: (list(hist.counts), hist.sum, hist.count)
+                for key, hist in self.histograms.items()
+            }
+        lines = []
+        for name, (description, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, labels), (counts, total, count) in sorted(
+                snapshot.items()
+            ):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{name}_bucket'
+                        f'{_labels(labels + (("le", _number(bound)),))} '
+                        f'{cumulative}'
+                    )
+                lines.append(
+                    f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} '
+                    f'{count}'
+                )
+                lines.append(f'{name}_sum{_labels(labels)} {total!r}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _labels(labels):
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in labels
+    ) + '}'
+
+
+REGISTRY = Registry()
+
+
+def metrics_view(request):
+    """Гистограммы всех маршрутов в текстовом формате Prometheus."""
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,58 @@
+"""
+JSON-рендерер на orjson, если он установлен.
+
+Вывод побайтно совпадает с rest_framework.renderers.JSONRenderer при
+настройках по умолчанию (компактный JSON, UTF-8 без экранирования,
+экранированные U+2028 и U+2029). Типы, которые orjson сериализует
+иначе, чем DRF (даты, ленивые строки и т. п.), передаются
+кодировщику DRF; запросы с отступами и нестандартные настройки
+рендерятся стандартным JSONRenderer.
+
+Дробные числа в экспоненциальной записи orjson пишет иначе (1e16,
+а не 1e+16), поэтому рендерер подключается только к ответам,
+где дробных чисел нет.
+"""
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson else 0
+)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    _drf_encoder = JSONEncoder()
+
+    def _native_default(self, obj):
+        return self._drf_encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.encoder_class is not JSONEncoder
+            or not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON)
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            content = orjson.dumps(
+                data, default=self._native_default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            # Например, целые больше 64 бит или ключи не-строки.
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return content.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,157 @@
+"""
+Чтение с реплик БД.
+
+Реплики перечисляются в DB_REPLICAS (см. settings). Маршрутизатор
+отправляет на реплику только чтения внутри безопасных запросов (GET,
+HEAD, OPTIONS); записи, чтения в транзакции, чтения вне запросов
+(команды, фоновые потоки) и чтения токенов идут в основную БД.
+
+Чтобы автор не увидел на реплике состояние до своей записи, после
+запроса, который писал в БД (рецепт, избранное, корзина, подписка
+и т. д.), его учётные данные (токен или сессия) на REPLICA_PIN_SECONDS
+секунд закрепляются за основной БД.
+
+Данные, которые кладутся в кэш до следующего изменения (ответы
+по версиям, справочники, индекс ингредиентов), читаются из основной
+БД через read_from_primary(): иначе запаздывающая реплика закэшировала
+бы старое состояние под новой версией.
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Модели, которые всегда читаются из основной БД: новый токен нужен
+# сразу после входа, а закрепить ещё не выданный токен нельзя.
+PRIMARY_MODELS = {'authtoken.token'}
+
+_current = ContextVar('replica_routing', default=None)
+_primary = ContextVar('read_from_primary', default=False)
+
+
+def pin_cache_key(credentials):
+    return 'db:pin:' + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def request_credentials(request):
+    """Токен или сессия запроса; по ним закрепляется основная БД."""
+    return request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+
+
+class RoutingState:
+    """Маршрутизация чтений одного запроса."""
+
+    def __init__(self, request):
+        self.safe = request.method in SAFE_METHODS
+        self.credentials = request_credentials(request)
+        self.wrote = False
+        self._replica = None
+
+    def replica(self):
+        """
+        Реплика для чтений запроса или None. Выбирается одна на запрос,
+        чтобы все чтения видели одно состояние; закрепление проверяется
+        при первом чтении, запросы без чтений в кэш не ходят.
+        """
+        if not self.safe or self.wrote:
+            return None
+        if self._replica is None:
+            pinned = self.credentials and cache.get(
+                pin_cache_key(self.credentials)
+            )
+            self._replica = DEFAULT_DB_ALIAS if pinned else random.choice(
+                settings.DATABASE_REPLICAS
+            )
+        if self._replica == DEFAULT_DB_ALIAS:
+            return None
+        return self._replica
+
+
+@contextmanager
+def read_from_primary():
+    """Чтения внутри блока идут в основную БД."""
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+class ReplicaRouter:
+    """Маршрутизатор БД для settings.DATABASE_ROUTERS."""
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if (
+            state is None
+            or _primary.get()
+            or model._meta.label_lower in PRIMARY_MODELS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Заводит состояние маршрутизации на время запроса и закрепляет
+    за основной БД учётные данные запроса, который писал в БД.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote and state.credentials:
+            cache.set(
+                pin_cache_key(state.credentials), True,
+                settings.REPLICA_PIN_SECONDS,
+            )
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote and state.credentials:
+            await cache.aset(
+                pin_cache_key(state.credentials), True,
+                settings.REPLICA_PIN_SECONDS,
+            )
+        return response
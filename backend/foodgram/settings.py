@@ -1,6 +1,9 @@
 import os
+import sys
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'default-secret-key')
@@ -28,11 +31,12 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework', 'rest_framework.authtoken', 'djoser',
-    'users', 'recipes', 'tags', 'ingredients',
+    'users', 'recipes', 'tags', 'ingredients', 'benchmarks',
     'django_filters', 'drf_spectacular',
 ]
 
 MIDDLEWARE = [
+    'foodgram.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,10 +45,16 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# Server-Timing раскрывает клиентам внутренние замеры (число и время
+# SQL-запросов), поэтому по умолчанию отдаётся только при DEBUG.
+# Гистограммы для /metrics собираются всегда.
+SERVER_TIMING_HEADER = os.getenv(
+    'SERVER_TIMING_HEADER', str(DEBUG)
+) == 'True'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -56,7 +66,7 @@ REST_FRAMEWORK = {
 }
 
 
-ROOT_URLCONF = 'foodgram.urls'
+ROOT_URLCONF = os.getenv('DJANGO_ROOT_URLCONF', 'foodgram.urls')
 
 TEMPLATES = [
     {
@@ -88,6 +98,31 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: DB_REPLICAS=host[:port][/name],... Пропущенные
+# порт и имя БД берутся у основной БД, так что для проверки хватит
+# второй БД на том же сервере: DB_REPLICAS=:5432/foodgram_replica.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    address, _, name = replica.strip().partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host or DATABASES['default']['HOST'],
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['foodgram.replicas.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'foodgram.replicas.ReplicaRoutingMiddleware')
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': (
@@ -129,4 +164,51 @@ STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.getenv('RECIPE_IMAGE_MAX_BYTES', 5 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(os.getenv('RECIPE_IMAGE_MAX_PIXELS', 25_000_000))
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+# Кэш в памяти процесса не виден другим воркерам: сбросы кэша ответов,
+# версии справочников и токенов до них не доходят. Такой кэш допустим
+# только при разработке (DEBUG) и в тестах.
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+if not (SHARED_CACHE or DEBUG or sys.argv[1:2] == ['test']):
+    raise ImproperlyConfigured(
+        'Без DEBUG нужен общий кэш: задайте CACHE_BACKEND и '
+        'CACHE_LOCATION, например Redis.'
+    )
+# Закрепление за основной БД после записи (foodgram.replicas) хранится
+# в кэше и должно быть видно всем процессам: с кэшем в памяти процесса
+# следующий запрос того же пользователя может прочитать отстающую
+# реплику и не увидеть свою запись.
+if DATABASE_REPLICAS and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        'DB_REPLICAS требует общего кэша: задайте CACHE_BACKEND и '
+        'CACHE_LOCATION, например Redis.'
+    )
+# Время жизни версий в кэше. Версия, сброс которой не дошёл до кэша
+# (ошибка соединения, изменение в обход сигналов), устаревает не позже
+# чем через это время.
+CACHE_VERSION_TIMEOUT = int(os.getenv('CACHE_VERSION_TIMEOUT', 60 * 60))
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_RESPONSE_CACHE_TIMEOUT', 300)
+)
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+SHORT_LINK_CACHE_TIMEOUT = int(
+    os.getenv('SHORT_LINK_CACHE_TIMEOUT', 7 * 24 * 60 * 60)
+)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
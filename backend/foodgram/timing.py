@@ -0,0 +1,153 @@
+"""
+Замер времени внутри запроса: SQL (число и время запросов через
+обёртку execute_wrappers соединения), сериализация в сериализаторах
+DRF и полное время обработки. Результат уходит в гистограммы
+маршрута (см. metrics), а при SERVER_TIMING_HEADER (по умолчанию
+при DEBUG) — ещё и в заголовок Server-Timing.
+
+Обёртка ставится на каждое новое соединение и находит замер текущего
+запроса через contextvars, поэтому считает и запросы асинхронного ORM,
+которые выполняются в другом потоке.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import REGISTRY
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0
+        self.serialize = 0
+        self.serializing = False
+        self.started = time.perf_counter()
+
+
+def current_timing():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    timing = current_timing()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serialization_timer():
+    """
+    Время блока попадает в замер сериализации; вложенные блоки
+    отдельно не считаются.
+    """
+    timing = current_timing()
+    if timing is None or timing.serializing:
+        yield
+        return
+    timing.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serialize += time.perf_counter() - started
+        timing.serializing = False
+
+
+class TimedSerializerMixin:
+    """
+    Время to_representation сериализатора верхнего уровня попадает
+    в замер сериализации; вложенные сериализаторы отдельно не считаются.
+    """
+
+    def to_representation(self, instance):
+        with serialization_timer():
+            return super().to_representation(instance)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class ServerTimingMiddleware:
+    """
+    Пишет замер в гистограммы по маршруту (имя URL, у ViewSet оно включает
+    действие), методу и классу статуса ответа. Работает и в
+    синхронном, и в асинхронном стеке. При SERVER_TIMING_HEADER
+    добавляет к ответу Server-Timing (db, serialize, view).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Соединения, открытые до загрузки модуля, сигнал не застал.
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(None, connection)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing):
+        total = time.perf_counter() - timing.started
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={timing.db * 1000:.1f};'
+                f'desc="{timing.queries} SQL", '
+                f'serialize;dur={timing.serialize * 1000:.1f}, '
+                f'view;dur={total * 1000:.1f}'
+            )
+        REGISTRY.observe(
+            (
+                ('route', route_name(request)),
+                ('method', request.method),
+                ('status', f'{response.status_code // 100}xx'),
+            ),
+            {
+                'foodgram_request_duration_seconds': total,
+                'foodgram_db_duration_seconds': timing.db,
+                'foodgram_db_queries': timing.queries,
+                'foodgram_serialize_duration_seconds': timing.serialize,
+            },
+        )
+        return response
@@ -5,6 +5,8 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from foodgram.metrics import metrics_view
+from recipes.shortlinks import short_link_redirect
 from users.views import (LogoutView, ObtainEmailAuthToken,
                          UserAvatarView)
 
@@ -37,4 +39,6 @@ urlpatterns = [
         UserAvatarView.as_view(),
         name='user-avatar',
     ),
+    path('s/<str:code>/', short_link_redirect, name='short-link'),
+    path('metrics', metrics_view, name='metrics'),
 ]
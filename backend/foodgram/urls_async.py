@@ -0,0 +1,25 @@
+"""
+Маршруты для ASGI: частые чтения обслуживают асинхронные
+представления, остальное — те же маршруты, что и в urls.
+"""
+from django.urls import path, re_path
+
+from .urls import urlpatterns as sync_urlpatterns
+from ingredients.async_views import ingredient_list
+from recipes.async_views import recipe_detail, recipe_list
+from tags.async_views import tag_list
+from users.async_views import subscriptions
+
+urlpatterns = [
+    path('api/recipes/', recipe_list, name='recipes-list'),
+    re_path(
+        r'^api/recipes/(?P<pk>[0-9]+)/$', recipe_detail,
+        name='recipes-detail',
+    ),
+    path('api/tags/', tag_list, name='tags-list'),
+    path('api/ingredients/', ingredient_list, name='ingredients-list'),
+    path(
+        'api/users/subscriptions/', subscriptions,
+        name='users-subscriptions',
+    ),
+] + sync_urlpatterns
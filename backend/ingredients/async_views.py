@@ -0,0 +1,35 @@
+"""
+Асинхронный список ингредиентов (ASGI): полный список — из кэша
+справочника, подсказки по ?name= — по индексу в памяти, если он уже
+построен для текущей версии. Иначе отвечает IngredientViewSet.
+"""
+from .autocomplete import (INGREDIENTS_CATALOGUE, autocomplete_limit,
+                           current_ingredient_index)
+from .urls import urlpatterns
+from .views import IngredientViewSet
+from foodgram.asynchrony import (accepts_json, async_read_view,
+                                 json_response, route_callback)
+from foodgram.caching import acached_catalogue_response
+from users.authentication import aget_request_user
+
+
+async def list_fast_path(request):
+    if await aget_request_user(request) is None:
+        return None
+    name = request.GET.get('name')
+    if not name:
+        return await acached_catalogue_response(
+            request, INGREDIENTS_CATALOGUE,
+            IngredientViewSet.catalogue_max_age,
+        )
+    if not accepts_json(request):
+        return None
+    index = current_ingredient_index(await INGREDIENTS_CATALOGUE.aget())
+    if index is None:
+        return None
+    return json_response(index.search(name, autocomplete_limit(request.GET)))
+
+
+ingredient_list = async_read_view(
+    route_callback(urlpatterns, 'ingredients-list'), list_fast_path
+)
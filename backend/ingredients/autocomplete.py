@@ -0,0 +1,89 @@
+"""
+Автодополнение ингредиентов по индексу в памяти процесса.
+
+Индекс — отсортированный по названию список, поиск префикса идёт
+бинарным поиском. Версия каталога хранится в общем кэше и меняется
+сигналами при изменении ингредиентов; процесс, заметивший новую
+версию, перестраивает свой индекс при следующем запросе.
+"""
+import threading
+from bisect import bisect_left
+
+from .models import Ingredient
+from foodgram.caching import CatalogueVersion
+from foodgram.replicas import read_from_primary
+
+INGREDIENTS_CATALOGUE = CatalogueVersion('ingredients')
+AUTOCOMPLETE_DEFAULT_LIMIT = 50
+AUTOCOMPLETE_MAX_LIMIT = 500
+
+
+class IngredientIndex:
+    def __init__(self, rows):
+        entries = sorted(
+            (name.casefold(), pk, name, unit) for pk, name, unit in rows
+        )
+        self.keys = [entry[0] for entry in entries]
+        self.items = [
+            {'id': pk, 'name': name, 'measurement_unit': unit}
+            for _, pk, name, unit in entries
+        ]
+
+    def search(self, query, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+        """
+        Сначала ингредиенты, название которых начинается с query,
+        затем те, где query встречается внутри названия; не более limit.
+        """
+        query = query.strip().casefold()
+        if not query:
+            return []
+        start = bisect_left(self.keys, query)
+        end = start
+        while (
+            end < len(self.keys) and end - start < limit
+            and self.keys[end].startswith(query)
+        ):
+            end += 1
+        result = self.items[start:end]
+        if len(result) < limit:
+            for key, item in zip(self.keys, self.items):
+                if query in key and not key.startswith(query):
+                    result.append(item)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+def autocomplete_limit(params):
+    """Значение ?limit= для подсказок, ограниченное 1..MAX."""
+    try:
+        limit = int(params['limit'])
+    except (KeyError, ValueError):
+        return AUTOCOMPLETE_DEFAULT_LIMIT
+    return min(max(limit, 1), AUTOCOMPLETE_MAX_LIMIT)
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index():
+    global _index, _index_version
+    version = INGREDIENTS_CATALOGUE.get()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                with read_from_primary():
+                    _index = IngredientIndex(
+                        Ingredient.objects.values_list(
+                            'pk', 'name', 'measurement_unit'
+                        )
+                    )
+                _index_version = version
+    return _index
+
+
+def current_ingredient_index(version):
+    """Уже построенный индекс версии version или None."""
+    return _index if _index_version == version else None
@@ -0,0 +1,155 @@
+"""
+Потоковая загрузка справочника ингредиентов из CSV и JSON.
+
+Файлы читаются построчно (CSV) или по объектам (JSON-массив или
+JSON Lines), так что размер файла не ограничен памятью. Строки
+пишутся пачками: на PostgreSQL через COPY во временную таблицу
+и INSERT ... ON CONFLICT DO NOTHING, на остальных БД — bulk_create
+только тех строк, которых ещё нет. Повторная загрузка безопасна.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .autocomplete import INGREDIENTS_CATALOGUE
+from .models import MAX_NAME_LENGTH, MAX_UNIT_LENGTH, Ingredient
+
+DEFAULT_BATCH_SIZE = 5000
+JSON_CHUNK_SIZE = 64 * 1024
+CSV_HEADER = ['name', 'measurement_unit']
+
+
+def read_csv(stream):
+    """Строки «название,единица»; заголовок, если есть, пропускается."""
+    for row in csv.reader(stream):
+        if not row or row == CSV_HEADER:
+            continue
+        yield tuple(row[:2]) if len(row) >= 2 else (row[0], '')
+
+
+def read_json(stream):
+    """
+    Объекты {"name": ..., "measurement_unit": ...} из JSON-массива или
+    JSON Lines, без загрузки всего файла в память.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n[,]':
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = stream.read(JSON_CHUNK_SIZE), 0
+            eof = not buffer
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(JSON_CHUNK_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        position = end
+        if isinstance(item, dict):
+            yield item.get('name', ''), item.get('measurement_unit', '')
+        else:
+            yield '', ''
+
+
+READERS = {'csv': read_csv, 'json': read_json}
+
+
+def clean_rows(rows, stats):
+    """
+    Обрезает пробелы, отбрасывает пустые и слишком длинные строки
+    и повторы внутри файла, считая их в stats.
+    """
+    seen = set()
+    for name, unit in rows:
+        name, unit = str(name or '').strip(), str(unit or '').strip()
+        if (
+            not name or not unit
+            or len(name) > MAX_NAME_LENGTH or len(unit) > MAX_UNIT_LENGTH
+        ):
+            stats['invalid'] += 1
+            continue
+        if (name, unit) in seen:
+            stats['existing'] += 1
+            continue
+        seen.add((name, unit))
+        yield name, unit
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_batch_copy(batch):
+    """Вставка пачки через COPY; возвращает число новых строк."""
+    table = connection.ops.quote_name(Ingredient._meta.db_table)
+    data = io.StringIO()
+    csv.writer(data).writerows(batch)
+    data.seek(0)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE ingredient_import '
+            '(name text, measurement_unit text) ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            'COPY ingredient_import (name, measurement_unit) '
+            'FROM STDIN WITH (FORMAT csv)',
+            data,
+        )
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            'SELECT name, measurement_unit FROM ingredient_import '
+            'ON CONFLICT (name, measurement_unit) DO NOTHING'
+        )
+        return cursor.rowcount
+
+
+def insert_batch_orm(batch):
+    """Вставка пачки через bulk_create; возвращает число новых строк."""
+    existing = set(
+        Ingredient.objects.filter(name__in={name for name, _ in batch})
+        .values_list('name', 'measurement_unit')
+    )
+    new = [
+        Ingredient(name=name, measurement_unit=unit)
+        for name, unit in batch if (name, unit) not in existing
+    ]
+    Ingredient.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new)
+
+
+def load_ingredients(stream, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Загружает ингредиенты из открытого текстового потока. Возвращает
+    {'inserted': ..., 'existing': ..., 'invalid': ...}.
+    """
+    insert_batch = (
+        insert_batch_copy if connection.vendor == 'postgresql'
+        else insert_batch_orm
+    )
+    stats = {'inserted': 0, 'existing': 0, 'invalid': 0}
+    for batch in batches(clean_rows(READERS[fmt](stream), stats), batch_size):
+        with transaction.atomic():
+            inserted = insert_batch(batch)
+        stats['inserted'] += inserted
+        stats['existing'] += len(batch) - inserted
+    if stats['inserted']:
+        INGREDIENTS_CATALOGUE.bump()
+    return stats
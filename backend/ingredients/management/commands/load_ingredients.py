@@ -0,0 +1,58 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ingredients.loader import DEFAULT_BATCH_SIZE, READERS, load_ingredients
+
+DEFAULT_PATH = Path(settings.BASE_DIR).parent / 'data' / 'ingredients.csv'
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает ингредиенты из CSV или JSON (по умолчанию '
+        'data/ingredients.csv). Уже существующие пары «название, '
+        'единица измерения» пропускаются, повторный запуск безопасен.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', type=Path, default=[DEFAULT_PATH],
+            help='Файлы с ингредиентами.',
+        )
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Формат файлов; по умолчанию — по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Число строк в одной пачке записи.',
+        )
+
+    def handle(self, *args, **options):
+        for path in options['paths']:
+            fmt = options['format'] or path.suffix.lstrip('.').lower()
+            if fmt == 'jsonl':
+                fmt = 'json'
+            if fmt not in READERS:
+                raise CommandError(
+                    f'{path}: неизвестный формат, укажите --format.'
+                )
+            started = time.perf_counter()
+            try:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    stats = load_ingredients(
+                        stream, fmt, batch_size=options['batch_size']
+                    )
+            except OSError as error:
+                raise CommandError(f'{path}: {error}')
+            except (json.JSONDecodeError, UnicodeDecodeError) as error:
+                raise CommandError(f'{path}: файл повреждён ({error}).')
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: добавлено {stats["inserted"]}, '
+                f'уже были {stats["existing"]}, '
+                f'некорректных {stats["invalid"]} '
+                f'за {time.perf_counter() - started:.1f} с.'
+            ))
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 
+from foodgram.timing import TimedSerializerMixin
+
 from .models import Ingredient
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit')
@@ -1,14 +1,45 @@
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets
+from rest_framework.response import Response
 
+from .autocomplete import (AUTOCOMPLETE_DEFAULT_LIMIT,
+                           INGREDIENTS_CATALOGUE, autocomplete_limit,
+                           get_ingredient_index)
 from .filters import IngredientFilter
 from .models import Ingredient
 from .serializers import IngredientSerializer
+from foodgram.caching import CachedCatalogueListMixin
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedCatalogueListMixin,
+                        viewsets.ReadOnlyModelViewSet):
+    """
+    Справочник ингредиентов. Полный список отдаётся из кэша с ETag.
+    С параметром ?name= работает как автодополнение: ответ строится
+    по индексу в памяти без обращения к БД — сначала совпадения
+    по началу названия, затем по подстроке, не более ?limit= записей.
+    """
+    catalogue_version = INGREDIENTS_CATALOGUE
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
+
+    @extend_schema(parameters=[
+        OpenApiParameter('limit', OpenApiTypes.INT, description=(
+            'Максимум подсказок при поиске по name '
+            f'(по умолчанию {AUTOCOMPLETE_DEFAULT_LIMIT}).'
+        )),
+    ])
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            get_ingredient_index().search(
+                name, autocomplete_limit(request.query_params)
+            )
+        )
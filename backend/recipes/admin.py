@@ -35,16 +35,15 @@ class IngredientInRecipeInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'get_favorites_count')
+    list_display = ('name', 'author', 'favorites_count', 'in_carts_count')
+    list_select_related = ('author',)
+    readonly_fields = (
+        'favorites_count', 'in_carts_count', 'version', 'updated_at'
+    )
     search_fields = ('name', 'author__username')
     list_filter = ('tags',)
     inlines = [IngredientInRecipeInline]
 
-    def get_favorites_count(self, obj):
-        return obj.favorited_by.count()
-
-    get_favorites_count.short_description = 'в избранном'
-
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
@@ -0,0 +1,89 @@
+"""
+Асинхронные список и деталь рецептов (ASGI).
+
+Быстрый путь повторяет ConditionalRecipeMixin и
+AnonymousResponseCacheMixin: считает ETag через асинхронный кэш (для
+детали — и ORM), отвечает 304 на совпавший If-None-Match, а анонимам
+отдаёт ответ из кэша ответов. Промах кэша и полные ответы авторизованным
+строит синхронный RecipeViewSet; прочитанное здесь состояние рецепта
+передаётся ему через атрибут запроса, чтобы не читать его дважды.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from .conditional import (RECIPE_STATES, apply_validators,
+                          list_validator_parts, make_etag,
+                          recipe_state_query, timestamp_of,
+                          validator_groups)
+from .response_cache import (AUTHORS, aget_versions, list_cache_groups,
+                             recipe_group, response_cache_key)
+from .urls import urlpatterns
+from foodgram.asynchrony import accepts_json, async_read_view, route_callback
+from tags.registry import aget_tag_registry
+from users.authentication import aget_request_user
+
+
+async def _cached_content(request, groups, normalized):
+    versions = await aget_versions([AUTHORS] + groups)
+    return await cache.aget(response_cache_key(request, normalized, versions))
+
+
+async def _conditional(request, user, parts, timestamp, groups, normalized,
+                       validator_extra=()):
+    etag = make_etag(parts, await aget_versions(
+        validator_groups(user) + list(validator_extra)
+    ))
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        if user.is_authenticated or groups is None:
+            return None
+        content = await _cached_content(request, groups, normalized)
+        if content is None:
+            return None
+        response = HttpResponse(content, content_type='application/json')
+    return apply_validators(response, etag, timestamp)
+
+
+async def list_fast_path(request):
+    if not (settings.SHARED_CACHE and accepts_json(request)):
+        return None
+    user = await aget_request_user(request)
+    if user is None:
+        return None
+    registry = await aget_tag_registry() if 'tags' in request.GET else None
+    groups, normalized = list_validator_parts(request.GET, registry)
+    key_parts = list_cache_groups(request.GET, registry) or (None, None)
+    return await _conditional(
+        request, user, ('list', normalized), None, *key_parts,
+        validator_extra=groups,
+    )
+
+
+async def detail_fast_path(request, pk):
+    if not accepts_json(request):
+        return None
+    user = await aget_request_user(request)
+    if user is None:
+        return None
+    state = await recipe_state_query(pk).afirst()
+    setattr(request, RECIPE_STATES, {pk: state})
+    if state is None:
+        return None
+    version, updated_at = state
+    timestamp = None if user.is_authenticated else timestamp_of(updated_at)
+    groups = None if request.GET else [recipe_group(int(pk))]
+    return await _conditional(
+        request, user, ('detail', pk, version), timestamp, groups, {}
+    )
+
+
+recipe_list = async_read_view(
+    route_callback(urlpatterns, 'recipes-list'), list_fast_path
+)
+recipe_detail = async_read_view(
+    route_callback(urlpatterns, 'recipes-detail'), detail_fast_path
+)
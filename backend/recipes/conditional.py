@@ -0,0 +1,130 @@
+"""
+Условные GET для списка и детали рецептов.
+
+ETag детали строится из версии рецепта, списка — из нормализованных
+параметров запроса и версий групп кэша ответов, в которые попадает
+выборка (лента, автор, теги), так что для списка в БД не ходим вовсе.
+Поэтому ETag списка отдаётся только с общим кэшем (SHARED_CACHE): с
+кэшем в памяти процесса сбросы версий не доходят до других процессов,
+и они отвечали бы 304 на изменившийся список.
+В обоих добавляются версии, от которых ещё зависит ответ: профили
+авторов, справочники и (для авторизованных) подписки, избранное
+и корзина пользователя. Совпавший ETag даёт 304 без сериализации.
+
+Last-Modified отдаётся только анонимам на детали: для списка время
+последнего изменения не отражает удаления, а для авторизованных —
+изменения избранного и корзины.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from .models import Recipe
+from .response_cache import (ALL_RECIPES, AUTHORS, get_versions,
+                             list_cache_groups, viewer_group)
+
+
+# Атрибут запроса со словарём {pk: (version, updated_at) или None}:
+# состояния рецептов, уже прочитанные асинхронным быстрым путём (ASGI),
+# чтобы синхронное представление не читало их повторно.
+RECIPE_STATES = 'recipe_states'
+
+
+def recipe_state_query(pk):
+    return Recipe.objects.filter(pk=pk).values_list('version', 'updated_at')
+
+
+def validator_groups(user):
+    groups = [AUTHORS]
+    if user.is_authenticated:
+        groups.append(viewer_group(user.pk))
+    return groups
+
+
+def list_validator_parts(params, registry=None):
+    """
+    Группы версий и нормализованные параметры страницы списка.
+    Запросы, которые не кэшируются (фильтры по избранному и корзине
+    и т. п.), зависят от всей ленты; избранное и корзину покрывает
+    группа пользователя.
+    """
+    key_parts = list_cache_groups(params, registry)
+    if key_parts is None:
+        return [ALL_RECIPES], sorted(
+            (name, sorted(values)) for name, values in params.lists()
+        )
+    groups, normalized = key_parts
+    return groups, sorted(normalized.items())
+
+
+def make_etag(parts, versions):
+    raw = '|'.join(map(str, tuple(parts) + tuple(versions)))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def timestamp_of(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def apply_validators(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ConditionalRecipeMixin:
+
+    def _validators(self, request, *parts, groups=()):
+        return make_etag(
+            parts,
+            get_versions(validator_groups(request.user) + list(groups)),
+        )
+
+    def _recipe_state(self, request, pk):
+        known = getattr(request, RECIPE_STATES, {})
+        if pk in known:
+            return known[pk]
+        return recipe_state_query(pk).first()
+
+    def _conditional(self, request, etag, last_modified, handler):
+        timestamp = timestamp_of(last_modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler()
+            if response.status_code != 200:
+                return response
+        return apply_validators(response, etag, timestamp)
+
+    def list(self, request, *args, **kwargs):
+        handler = super().list
+        if not settings.SHARED_CACHE:
+            return handler(request, *args, **kwargs)
+        groups, normalized = list_validator_parts(request.query_params)
+        etag = self._validators(request, 'list', normalized, groups=groups)
+        return self._conditional(
+            request, etag, None,
+            lambda: handler(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        handler = super().retrieve
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        state = self._recipe_state(request, pk) if pk.isdigit() else None
+        if state is None:
+            return handler(request, *args, **kwargs)
+        version, updated_at = state
+        etag = self._validators(request, 'detail', pk, version)
+        if request.user.is_authenticated:
+            updated_at = None
+        return self._conditional(
+            request, etag, updated_at,
+            lambda: handler(request, *args, **kwargs),
+        )
@@ -0,0 +1,60 @@
+"""
+Денормализованные счётчики: Recipe.favorites_count и in_carts_count,
+User.recipes_count и subscribers_count. Обновляются сигналами через F(),
+полностью пересчитываются командой rebuild_counters.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import (Count, F, OuterRef, QuerySet, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def change_counters(queryset, field, delta):
+    """Меняет счётчик у всех строк queryset одним UPDATE."""
+    return queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def change_counter(model, pk, field, delta):
+    change_counters(model.objects.filter(pk=pk), field, delta)
+
+
+def deleted_directly(sender, instance, origin):
+    """
+    Строка удалена сама по себе или массовым удалением строк своей
+    модели, а не каскадом: при каскаде счётчики пересчитываются
+    пачкой (см. user_deleting) или принадлежат удаляемому объекту.
+    """
+    return origin is None or origin is instance or (
+        isinstance(origin, QuerySet) and origin.model is sender
+    )
+
+
+def _count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики по фактическим данным."""
+    recipes = Recipe.objects.update(
+        favorites_count=_count_subquery(Favorite, 'recipe'),
+        in_carts_count=_count_subquery(ShoppingCart, 'recipe'),
+    )
+    users = User.objects.update(
+        recipes_count=_count_subquery(Recipe, 'author'),
+        subscribers_count=_count_subquery(Subscription, 'author'),
+    )
+    return recipes, users
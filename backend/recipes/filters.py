@@ -1,60 +1,79 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from .models import Recipe
-from tags.models import Tag
+from .models import Favorite, Recipe, ShoppingCart
+from tags.registry import get_tag_registry
 
 
 class RecipeFilter(filters.FilterSet):
+    """
+    Все фильтры, затрагивающие связанные таблицы, построены на EXISTS,
+    а не на JOIN, поэтому строки рецептов не дублируются и списку
+    не нужен DISTINCT.
+    """
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.CharFilter(method='filter_tags')
     author = filters.NumberFilter(field_name='author__id')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart', 'search'
+        )
+
+    def __init__(self, *args, tag_registry=None, **kwargs):
+        """
+        tag_registry — уже загруженный словарь тегов, чтобы фильтр
+        не обращался за ним к кэшу (нужно асинхронному коду).
+        """
+        super().__init__(*args, **kwargs)
+        self.tag_registry = tag_registry
 
     def filter_is_favorited(self, qs, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return qs.filter(favorited_by__user=user)
+            return qs.filter(Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ))
         return qs
 
     def filter_is_in_shopping_cart(self, qs, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return qs.filter(in_carts__user=user)
+            return qs.filter(Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ))
         return qs
 
     def filter_tags(self, qs, name, value):
-        params = self.request.query_params
-        tags_params_check = ('tags' in params) or (value is not None)
-
-        raw_values = params.getlist('tags')
-        if not raw_values and value:
-            raw_values = [value]
-
         values = []
-        for value in raw_values:
-            if value:
-                parts = [part.strip() for part in value.split(',')]
-                values.extend([part for part in parts if part])
-
-        if not tags_params_check:
-            return qs
-
+        for raw in self.request.query_params.getlist('tags') or [value]:
+            values.extend(part.strip() for part in raw.split(','))
+        values = [slug for slug in values if slug]
         if not values:
             return qs
 
-        all_slugs = set(Tag.objects.values_list('slug', flat=True))
-        valid_slugs = sorted(set(v for v in values if v in all_slugs))
+        registry = self.tag_registry
+        if registry is None:
+            registry = get_tag_registry()
+        tag_ids = {registry[slug] for slug in values if slug in registry}
 
-        if not valid_slugs:
+        if not tag_ids:
             return qs.none()
 
-        if set(valid_slugs) == all_slugs and all_slugs:
+        if len(tag_ids) == len(registry):
             return qs
 
-        return qs.filter(tags__slug__in=valid_slugs).distinct()
+        return qs.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag_id__in=tag_ids
+            )
+        ))
+
+    def filter_search(self, qs, name, value):
+        value = value.strip()
+        return qs.search(value) if value else qs
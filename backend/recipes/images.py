@@ -0,0 +1,148 @@
+"""
+Фоновая обработка изображений рецептов.
+
+Оригинал сохраняется в запросе как есть, а уменьшенные копии в WebP
+строятся после коммита транзакции в пуле потоков процесса. Рецепты,
+для которых копии не построились (например, процесс был остановлен),
+догоняет команда generate_image_variants. Копии прежнего изображения
+удаляются после коммита смены изображения или удаления рецепта.
+"""
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (600, 600),
+    'full': (1600, 1600),
+}
+VARIANTS_DIR = 'recipes/images/variants'
+WEBP_QUALITY = 80
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'RECIPE_IMAGE_WORKERS', 2),
+    thread_name_prefix='recipe-images',
+)
+
+
+def validate_image_limits(file):
+    """
+    Размер файла и число пикселей загруженного изображения не больше
+    RECIPE_IMAGE_MAX_BYTES и RECIPE_IMAGE_MAX_PIXELS. Уже сохранённые
+    файлы не проверяются; формат проверяет само поле изображения.
+    """
+    if getattr(file, '_committed', False):
+        return
+    max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+    if file.size > max_bytes:
+        raise ValidationError(f'Размер изображения больше {max_bytes} байт.')
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            width, height = image.size
+    except Exception:
+        return
+    finally:
+        file.seek(0)
+    if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise ValidationError('Слишком большое разрешение изображения.')
+
+
+def variant_name(image_name, variant):
+    stem = posixpath.splitext(posixpath.basename(image_name))[0]
+    return f'{VARIANTS_DIR}/{stem}_{variant}.webp'
+
+
+def _delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.exception('Не удалось удалить файл %s', name)
+
+
+def delete_image_variants(image_name):
+    """Удаляет копии изображения image_name после коммита транзакции."""
+    if not image_name:
+        return
+    names = [variant_name(image_name, variant) for variant in IMAGE_VARIANTS]
+    transaction.on_commit(lambda: _delete_files(names))
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_image_variants(recipe_id):
+    """
+    Строит все копии изображения рецепта и записывает их пути
+    в Recipe.image_variants, если изображение не сменилось за это время.
+    """
+    from .models import Recipe
+    from .response_cache import invalidate_recipes
+
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return {}
+    image_name = recipe.image.name
+    with recipe.image.open('rb') as source:
+        image = Image.open(source)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        transparent = (
+            'transparency' in image.info or 'A' in image.getbands()
+        )
+        image = image.convert('RGBA' if transparent else 'RGB')
+
+    variants = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        name = variant_name(image_name, variant)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        variants[variant] = default_storage.save(
+            name, ContentFile(render_variant(image, size))
+        )
+    if not Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_variants=variants,
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    ):
+        # Изображение сменили или рецепт удалили, пока строились копии.
+        _delete_files(variants.values())
+        return {}
+    invalidate_recipes([recipe_id])
+    return variants
+
+
+def _run_in_background(recipe_id):
+    try:
+        generate_image_variants(recipe_id)
+    except Exception:
+        logger.exception(
+            'Не удалось построить копии изображения рецепта %s', recipe_id
+        )
+    finally:
+        connections.close_all()
+
+
+def schedule_image_variants(recipe_id):
+    """Ставит построение копий в очередь после коммита транзакции."""
+    transaction.on_commit(
+        lambda: _executor.submit(_run_in_background, recipe_id)
+    )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные WebP-копии изображений рецептов, для которых '
+        'их ещё нет (или для всех рецептов с --all).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить копии для всех рецептов.',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        done = failed = 0
+        for recipe_id in recipes.values_list('pk', flat=True).iterator():
+            try:
+                generate_image_variants(recipe_id)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {done}, с ошибками: {failed}.'
+        ))
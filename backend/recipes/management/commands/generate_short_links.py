@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shortlinks import BULK_BATCH_SIZE, generate_links
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт короткие ссылки для всех рецептов, у которых их ещё нет, '
+        'и кладёт новые коды в кэш.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_BATCH_SIZE,
+            help='Число ссылок в одной пачке записи.',
+        )
+
+    def handle(self, *args, **options):
+        created = generate_links(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано коротких ссылок: {created}.'
+        ))
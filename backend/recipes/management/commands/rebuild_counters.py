@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики избранного и корзин у рецептов, '
+        'рецептов и подписчиков у пользователей.'
+    )
+
+    def handle(self, *args, **options):
+        recipes, users = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}.'
+        ))
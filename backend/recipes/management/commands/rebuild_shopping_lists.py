@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_list import (BULK_BATCH_SIZE, rebuild_shopping_lists,
+                                   shopping_list_mismatches)
+
+MAX_REPORTED_MISMATCHES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает списки покупок всех пользователей по содержимому '
+        'корзин, например после изменений в обход сигналов. С --check '
+        'только сверяет таблицу с суммами, посчитанными заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_BATCH_SIZE,
+            help='Размер пачки вставки.',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Не пересобирать, а сверить и завершиться с ошибкой '
+                 'при расхождениях.',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = shopping_list_mismatches()
+            if mismatches:
+                lines = [
+                    f'user={user} ingredient={ingredient}: '
+                    f'в таблице {actual}, по корзинам {expected}'
+                    for (user, ingredient), (actual, expected)
+                    in sorted(mismatches.items())[:MAX_REPORTED_MISMATCHES]
+                ]
+                raise CommandError(
+                    f'Расхождений в списках покупок: {len(mismatches)}\n'
+                    + '\n'.join(lines)
+                )
+            self.stdout.write(self.style.SUCCESS(
+                'Списки покупок совпадают с корзинами.'
+            ))
+            return
+        created = rebuild_shopping_lists(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Строк в списках покупок: {created}.'
+        ))
@@ -0,0 +1,82 @@
+# Generated by Django 4.2 on 2026-10-18 11:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=('search_vector',), name='recipe_search_vector_gin'
+)
+
+CREATE_TRIGGER = """
+CREATE FUNCTION recipes_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_recipe_search_vector
+BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector_update();
+
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+    || setweight(to_tsvector('russian', coalesce(text, '')), 'B');
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS recipes_recipe_search_vector ON recipes_recipe;
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector_update();
+"""
+
+
+def is_postgresql(schema_editor):
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+def create_search_index(apps, schema_editor):
+    if is_postgresql(schema_editor):
+        Recipe = apps.get_model('recipes', 'Recipe')
+        schema_editor.add_index(Recipe, SEARCH_INDEX)
+        schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_search_index(apps, schema_editor):
+    if is_postgresql(schema_editor):
+        Recipe = apps.get_model('recipes', 'Recipe')
+        schema_editor.execute(DROP_TRIGGER)
+        schema_editor.remove_index(Recipe, SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+    """
+    search_vector заполняет триггер PostgreSQL, поэтому вектор
+    актуален и после bulk_create. GIN-индекс и триггер создаются только
+    на PostgreSQL; на других БД колонка остаётся пустой, а поиск идёт
+    по подстроке.
+    """
+
+    dependencies = [
+        ('recipes', '0005_recipe_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name='Поисковый вектор'
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='recipe', index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-18 14:00
+
+import string
+
+from django.db import migrations, models
+
+ALPHABET = string.digits + string.ascii_letters
+
+
+def encode_base62(number):
+    code = ''
+    while True:
+        number, digit = divmod(number, len(ALPHABET))
+        code = ALPHABET[digit] + code
+        if not number:
+            return code
+
+
+def fill_codes(apps, schema_editor):
+    ShortLink = apps.get_model('recipes', 'ShortLink')
+    links = list(ShortLink.objects.only('pk', 'recipe_id'))
+    for link in links:
+        link.code = encode_base62(link.recipe_id)
+    ShortLink.objects.bulk_update(links, ['code'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    """
+    short_url хранил полный адрес рецепта с хостом первого запроса;
+    вместо него — код base62 от id рецепта, из которого адрес /s/<code>/
+    собирается на каждый запрос.
+    """
+
+    dependencies = [
+        ('recipes', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='code',
+            field=models.CharField(
+                editable=False, max_length=16, null=True, verbose_name='код'
+            ),
+        ),
+        migrations.RunPython(fill_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='shortlink',
+            name='code',
+            field=models.CharField(
+                editable=False, max_length=16, unique=True, verbose_name='код'
+            ),
+        ),
+        migrations.RemoveField(
+            model_name='shortlink',
+            name='short_url',
+        ),
+    ]
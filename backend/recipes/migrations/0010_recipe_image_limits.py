@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 06:10
+
+from django.db import migrations, models
+import recipes.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(upload_to='recipes/images/', validators=[recipes.images.validate_image_limits], verbose_name='Изображение'),
+        ),
+    ]
@@ -1,14 +1,142 @@
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.db import connections, models
+from django.db.models import (Case, Exists, F, FloatField, OuterRef, Q, Value,
+                              When, Window)
+from django.db.models.functions import RowNumber
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
+from .images import (delete_image_variants, schedule_image_variants,
+                     validate_image_limits)
+from foodgram.counters import CounterFieldsMixin
 from ingredients.models import Ingredient
 from tags.models import Tag
+from users.models import Subscription
 
 MAX_RECIPE_NAME_LENGTH = 256
+SEARCH_CONFIG = 'russian'
+MAX_SHORT_LINK_CODE_LENGTH = 16
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        """
+        Аннотирует рецепты флагами is_favorited и is_in_shopping_cart
+        для пользователя user коррелированными подзапросами EXISTS.
+        """
+        if not getattr(user, 'is_authenticated', False):
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+    def latest_by_author(self, authors, limit=None):
+        """
+        Последние limit рецептов каждого из авторов одним запросом
+        с ROW_NUMBER() OVER (PARTITION BY author); без limit — все.
+        """
+        queryset = self.filter(author__in=authors)
+        if limit is not None:
+            queryset = queryset.annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=F('pk').desc(),
+                )
+            ).filter(row_number__lte=limit)
+        return queryset.order_by('author_id', '-pk')
+
+    def feed_ids(self, user, limit, position=None, reverse=False):
+        """
+        id не более limit рецептов авторов, на которых подписан user:
+        самые новые с id меньше position, с reverse — самые старые
+        с id больше position. На PostgreSQL у каждого автора берётся
+        не больше limit id из индекса (author, id) через LATERAL,
+        и только они сливаются, поэтому стоимость не зависит от того,
+        сколько рецептов у авторов.
+        """
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            queryset = self.filter(
+                author__in=Subscription.objects.filter(user=user)
+                .values('author')
+            )
+            if position is not None:
+                lookup = 'pk__gt' if reverse else 'pk__lt'
+                queryset = queryset.filter(**{lookup: position})
+            return list(
+                queryset.order_by('pk' if reverse else '-pk')
+                .values_list('pk', flat=True)[:limit]
+            )
+        quote = connection.ops.quote_name
+        direction = 'ASC' if reverse else 'DESC'
+        bound = ''
+        params = []
+        if position is not None:
+            bound = 'AND r.id > %s' if reverse else 'AND r.id < %s'
+            params.append(position)
+        sql = f'''
+            SELECT feed.id FROM {quote(Subscription._meta.db_table)} s
+            CROSS JOIN LATERAL (
+                SELECT r.id FROM {quote(self.model._meta.db_table)} r
+                WHERE r.author_id = s.author_id {bound}
+                ORDER BY r.id {direction} LIMIT %s
+            ) feed
+            WHERE s.user_id = %s
+            ORDER BY feed.id {direction} LIMIT %s
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit, user.pk, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def search(self, query):
+        """
+        Полнотекстовый поиск по названию и описанию, сначала самые
+        релевантные. На PostgreSQL ищет по search_vector с GIN-индексом,
+        на остальных БД — по подстроке, выше совпадения в названии.
+        """
+        if connections[self.db].vendor == 'postgresql':
+            search_query = SearchQuery(
+                query, config=SEARCH_CONFIG, search_type='websearch'
+            )
+            queryset = self.filter(search_vector=search_query).annotate(
+                search_rank=SearchRank(F('search_vector'), search_query)
+            )
+        else:
+            queryset = self.filter(
+                Q(name__icontains=query) | Q(text__icontains=query)
+            ).annotate(search_rank=Case(
+                When(name__icontains=query, then=Value(1.0)),
+                default=Value(0.5),
+                output_field=FloatField(),
+            ))
+        return queryset.order_by('-search_rank', '-pk')
+
+    def touch(self):
+        """Отмечает рецепты изменёнными: новая версия и время изменения."""
+        return self.update(
+            version=F('version') + 1, updated_at=timezone.now()
+        )
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    def get_queryset(self):
+        # search_vector нужен только в WHERE и ORDER BY поиска.
+        return super().get_queryset().defer('search_vector')
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -24,6 +152,7 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         null=False,
         blank=False,
+        validators=[validate_image_limits],
     )
     text = models.TextField(verbose_name='Описание')
     cooking_time = models.PositiveIntegerField(
@@ -34,14 +163,86 @@ class Recipe(models.Model):
         related_name='recipes',
         verbose_name='Теги',
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Копии изображения',
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='в избранном',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='в корзинах',
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Версия',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменён',
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+    )
+
+    objects = RecipeManager()
+
+    COUNTER_FIELDS = ('favorites_count', 'in_carts_count')
+    _loaded_image = None
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            GinIndex(
+                fields=('search_vector',), name='recipe_search_vector_gin'
+            ),
+            # Лента подписок: последние рецепты каждого автора.
+            models.Index(
+                fields=('author', 'id'), name='recipe_author_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+    def save(self, *args, **kwargs):
+        image_changed = (
+            'image' in self.__dict__
+            and self.image.name != self._loaded_image
+        )
+        if image_changed:
+            self.image_variants = {}
+        bump_version = (
+            not self._state.adding and kwargs.get('update_fields') is None
+        )
+        if bump_version:
+            self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        if bump_version:
+            self.refresh_from_db(fields=('version',))
+        if image_changed:
+            delete_image_variants(self._loaded_image)
+            if self.image:
+                schedule_image_variants(self.pk)
+        self._loaded_image = self.image.name
+
 
 class IngredientInRecipe(models.Model):
     recipe = models.ForeignKey(
@@ -105,6 +306,32 @@ class ShoppingCart(models.Model):
         verbose_name_plural = 'Корзины'
 
 
+class ShoppingListItem(models.Model):
+    """
+    Сумма ингредиента по всем рецептам из корзины пользователя.
+    Поддерживается при изменении корзины и ингредиентов рецептов,
+    см. shopping_list; пересчитывается командой rebuild_shopping_lists.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ингредиент',
+    )
+    total_amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        unique_together = ('user', 'ingredient')
+        verbose_name = 'Строка списка покупок'
+        verbose_name_plural = 'Списки покупок'
+
+
 class ShortLink(models.Model):
     recipe = models.OneToOneField(
         Recipe,
@@ -112,5 +339,10 @@ class ShortLink(models.Model):
         related_name='shortlink',
         verbose_name='Рецепт',
     )
-    short_url = models.URLField('короткая ссылка')
+    code = models.CharField(
+        verbose_name='код',
+        max_length=MAX_SHORT_LINK_CODE_LENGTH,
+        unique=True,
+        editable=False,
+    )
     created = models.DateTimeField(auto_now_add=True, verbose_name='создана')
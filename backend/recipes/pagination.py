@@ -1,4 +1,7 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .models import Recipe
 
 
 class PageNumberLimitPagination(PageNumberPagination):
@@ -6,3 +9,70 @@ class PageNumberLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_query_param = 'page'
     max_page_size = 100
+
+
+class CursorLimitPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class PageNumberOrCursorPagination(PageNumberLimitPagination):
+    """
+    Пагинация по номеру страницы. Если в запросе есть параметр ?cursor=
+    (для первой страницы — пустой), включается курсорная пагинация по -id:
+    без COUNT(*) и OFFSET, с непрозрачными ссылками next/previous.
+    """
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = CursorLimitPagination
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        cursor_parameters = [
+            parameter for parameter in self.cursor_pagination_class()
+            .get_schema_operation_parameters(view)
+            if parameter['name'] == self.cursor_query_param
+        ]
+        return parameters + cursor_parameters
+
+
+class FeedCursorPagination(CursorLimitPagination):
+    """
+    Курсорная пагинация ленты подписок. Перед обычной обработкой DRF
+    набор сужается до id рецептов за курсором, которые находит
+    Recipe.objects.feed_ids, так что БД не перебирает все рецепты
+    авторов из подписок.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = self.decode_cursor(request)
+        offset, reverse, position = cursor or (0, False, None)
+        if position is not None:
+            try:
+                position = int(position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+        ids = Recipe.objects.feed_ids(
+            request.user,
+            offset + self.get_page_size(request) + 1,
+            position,
+            reverse,
+        )
+        return super().paginate_queryset(
+            queryset.filter(pk__in=ids), request, view
+        )
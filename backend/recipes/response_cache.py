@@ -0,0 +1,248 @@
+"""
+Кэш ответов списка и детали рецептов для анонимных пользователей.
+
+Ключ ответа складывается из нормализованной строки запроса и версий
+тех групп данных, от которых ответ зависит: рецепта (деталь), автора
+и тегов из фильтра либо всей ленты (список), профилей авторов и
+справочников тегов и ингредиентов. Версия — случайный токен в общем
+кэше. Сигналы после коммита меняют версии только затронутых групп,
+так что остальные ответы остаются в кэше.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from .models import Recipe
+from ingredients.autocomplete import INGREDIENTS_CATALOGUE
+from foodgram.renderers import FastJSONRenderer
+from foodgram.replicas import read_from_primary
+from tags.models import Tag
+from tags.registry import TAGS_CATALOGUE, get_tag_registry
+
+ALL_RECIPES = 'all'
+# Профили всех авторов сразу, для массовых изменений; правка одного
+# профиля сбрасывает только ответы с рецептами этого автора.
+AUTHORS = 'authors'
+CACHEABLE_LIST_PARAMS = frozenset(
+    ('page', 'limit', 'tags', 'author', 'cursor', 'search')
+)
+REBUILD_LOCK_TIMEOUT = 10
+REBUILD_WAIT_STEP = 0.05
+REBUILD_WAIT_STEPS = 40
+
+
+def recipe_group(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def author_group(author_id):
+    return f'author:{author_id}'
+
+
+def tag_group(slug):
+    return f'tag:{slug}'
+
+
+def viewer_group(user_id):
+    """Подписки, избранное и корзина пользователя."""
+    return f'viewer:{user_id}'
+
+
+def _version_key(group):
+    return f'recipes:version:{group}'
+
+
+def get_versions(groups):
+    """
+    Версии групп одним обращением к кэшу. Отсутствующие версии
+    создаются через add, чтобы не затереть параллельную инвалидацию.
+    """
+    keys = [_version_key(group) for group in groups]
+    keys += [TAGS_CATALOGUE.cache_key, INGREDIENTS_CATALOGUE.cache_key]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(
+                key, uuid.uuid4().hex, settings.CACHE_VERSION_TIMEOUT
+            )
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+async def aget_versions(groups):
+    keys = [_version_key(group) for group in groups]
+    keys += [TAGS_CATALOGUE.cache_key, INGREDIENTS_CATALOGUE.cache_key]
+    versions = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            await cache.aadd(
+                key, uuid.uuid4().hex, settings.CACHE_VERSION_TIMEOUT
+            )
+        versions.update(await cache.aget_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+def invalidate(groups):
+    """Меняет версии групп после коммита текущей транзакции."""
+    groups = set(groups)
+    if not groups:
+        return
+    transaction.on_commit(lambda: cache.set_many(
+        {_version_key(group): uuid.uuid4().hex for group in groups},
+        settings.CACHE_VERSION_TIMEOUT,
+    ))
+
+
+def invalidate_recipes(recipe_ids, tag_ids=()):
+    """
+    Сбрасывает ответы, где могут быть эти рецепты: их детали, ленты
+    их авторов и тегов (и тегов tag_ids), а также общую ленту.
+    """
+    recipe_ids = set(recipe_ids)
+    tag_slugs = set(
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .values_list('tag__slug', flat=True)
+    )
+    if tag_ids:
+        tag_slugs.update(
+            Tag.objects.filter(pk__in=tag_ids).values_list('slug', flat=True)
+        )
+    author_ids = Recipe.objects.filter(pk__in=recipe_ids).values_list(
+        'author_id', flat=True
+    )
+    invalidate(
+        [ALL_RECIPES]
+        + [recipe_group(pk) for pk in recipe_ids]
+        + [author_group(pk) for pk in author_ids]
+        + [tag_group(slug) for slug in tag_slugs]
+    )
+
+
+def list_cache_groups(params, registry=None):
+    """
+    Группы, от которых зависит страница списка, и нормализованные
+    параметры; None, если ответ на такой запрос не кэшируется.
+    registry — уже загруженный словарь тегов.
+    """
+    if not set(params) <= CACHEABLE_LIST_PARAMS:
+        return None
+    normalized = {
+        name: params[name] for name in ('page', 'limit', 'cursor')
+        if name in params
+    }
+    groups = []
+    search = ' '.join(params.get('search', '').split()).casefold()
+    if search:
+        # Поиск может найти любой рецепт.
+        normalized['search'] = search
+        groups.append(ALL_RECIPES)
+    author = params.get('author')
+    if author is not None:
+        if not author.isdigit():
+            return None
+        normalized['author'] = int(author)
+        groups.append(author_group(int(author)))
+    slugs = sorted({
+        part.strip() for raw in params.getlist('tags')
+        for part in raw.split(',') if part.strip()
+    })
+    if slugs:
+        normalized['tags'] = ','.join(slugs)
+        if registry is None:
+            registry = get_tag_registry()
+        known = [slug for slug in slugs if slug in registry]
+        if len(known) < len(registry):
+            groups += [tag_group(slug) for slug in known]
+            return groups, normalized
+    if author is None and not search:
+        groups.append(ALL_RECIPES)
+    return groups, normalized
+
+
+def response_cache_key(request, normalized, versions):
+    raw = '|'.join([
+        request.scheme, request.get_host(), request.path,
+        repr(sorted(normalized.items())), *versions,
+    ])
+    return 'recipes:response:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Отдаёт анонимным пользователям список и деталь рецептов
+    из кэша уже отрендеренным JSON.
+    """
+    response_cache_timeout = settings.RECIPE_RESPONSE_CACHE_TIMEOUT
+
+    def _response_cache_key(self, request, groups, normalized):
+        return response_cache_key(
+            request, normalized, get_versions([AUTHORS] + groups)
+        )
+
+    def _cacheable(self, request):
+        return (
+            not request.user.is_authenticated
+            and request.accepted_renderer.format == 'json'
+        )
+
+    def _wait_for(self, key):
+        """
+        Ответ строит другой запрос: ждём его, а не идём в БД сами,
+        чтобы всплеск трафика на холодный ключ не стал всплеском запросов.
+        """
+        for _ in range(REBUILD_WAIT_STEPS):
+            time.sleep(REBUILD_WAIT_STEP)
+            content = cache.get(key)
+            if content is not None:
+                return content
+        return None
+
+    def _cached_response(self, request, groups, normalized, handler):
+        key = self._response_cache_key(request, groups, normalized)
+        content = cache.get(key)
+        if content is None and not cache.add(
+            f'{key}:lock', True, REBUILD_LOCK_TIMEOUT
+        ):
+            content = self._wait_for(key)
+        if content is None:
+            try:
+                with read_from_primary():
+                    response = handler()
+                if response.status_code != 200:
+                    return response
+                content = FastJSONRenderer().render(response.data)
+                cache.set(key, content, self.response_cache_timeout)
+            finally:
+                cache.delete(f'{key}:lock')
+        return HttpResponse(content, content_type='application/json')
+
+    def list(self, request, *args, **kwargs):
+        handler = super().list
+        if self._cacheable(request):
+            key_parts = list_cache_groups(request.query_params)
+            if key_parts is not None:
+                return self._cached_response(
+                    request, *key_parts,
+                    lambda: handler(request, *args, **kwargs),
+                )
+        return handler(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        handler = super().retrieve
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if (
+            self._cacheable(request) and pk.isdigit()
+            and not request.query_params
+        ):
+            return self._cached_response(
+                request, [recipe_group(int(pk))], {},
+                lambda: handler(request, *args, **kwargs),
+            )
+        return handler(request, *args, **kwargs)
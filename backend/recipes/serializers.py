@@ -1,33 +1,93 @@
 import base64
-import imghdr
+import io
 import uuid
 
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
+from drf_spectacular.utils import extend_schema_serializer
+from PIL import Image
 from rest_framework import serializers
 
+from .images import IMAGE_VARIANTS, validate_image_limits
 from .models import Recipe, IngredientInRecipe
+from .shopping_list import refresh_recipe_ingredients
+from foodgram.timing import TimedSerializerMixin, serialization_timer
 from ingredients.models import Ingredient
 from tags.models import Tag
 from tags.serializers import TagSerializer
 from users.serializers import UserSerializer
+from users.viewer import get_viewer_context
 
 
 class Base64ImageField(serializers.ImageField):
+    """
+    Изображение в base64 или обычной загрузкой файла. Размер base64
+    проверяется до декодирования, а размер и число пикселей любого
+    файла — validate_image_limits; сам файл сохраняется как есть,
+    уменьшенные копии строятся в фоне (см. recipes.images).
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('validators', [validate_image_limits])
+        super().__init__(*args, **kwargs)
+
     def to_internal_value(self, data):
         if isinstance(data, str):
             if 'base64,' in data:
                 _, data = data.split('base64,', 1)
+            max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+            if len(data) * 3 // 4 > max_bytes:
+                raise serializers.ValidationError(
+                    f'Размер изображения больше {max_bytes} байт.'
+                )
             try:
                 decoded = base64.b64decode(data)
             except Exception:
                 raise serializers.ValidationError('Некорректный base64.')
-            ext = imghdr.what(None, decoded) or 'jpg'
+            ext = 'jpg'
+            try:
+                with Image.open(io.BytesIO(decoded)) as image:
+                    ext = image.format.lower()
+            except Exception:
+                pass
             file_name = f'{uuid.uuid4().hex}.{ext}'
             data = ContentFile(decoded, name=file_name)
         return super().to_internal_value(data)
 
 
+# Копия, которая отдаётся в поле image вместо оригинала.
+MAIN_IMAGE_VARIANT = 'full'
+
+
+def build_image_urls(obj, request):
+    """
+    Абсолютные ссылки на копии изображения рецепта. Пока копии
+    не построены, вместо каждой отдаётся оригинал.
+    """
+    try:
+        original = obj.image.url
+    except Exception:
+        return dict.fromkeys(IMAGE_VARIANTS, '')
+    storage = obj.image.storage
+    variants = obj.image_variants or {}
+    urls = {}
+    for variant in IMAGE_VARIANTS:
+        name = variants.get(variant)
+        url = storage.url(name) if name else original
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def build_image_url(obj, request):
+    """
+    Ссылка для поля image: уменьшенная копия MAIN_IMAGE_VARIANT,
+    а пока копии не построены — оригинал.
+    """
+    return build_image_urls(obj, request)[MAIN_IMAGE_VARIANT]
+
+
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         source='ingredient',
@@ -43,59 +103,114 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeMiniFieldSerializer(serializers.ModelSerializer):
+class RecipeMiniFieldSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
+
+    def get_image_variants(self, obj):
+        return build_image_urls(obj, self.context.get('request'))
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        try:
-            url = obj.image.url
-        except Exception:
-            return ''
-        return request.build_absolute_uri(url) if request else url
+        return build_image_url(obj, self.context.get('request'))
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     tags = TagSerializer(many=True)
     author = UserSerializer(read_only=True)
     ingredients = IngredientInRecipeSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'image_variants', 'text', 'cooking_time'
         )
 
+    def _get_user_flag(self, obj, name):
+        value = getattr(obj, name, None)
+        if value is not None:
+            return value
+        viewer = get_viewer_context(self.context['request'])
+        return getattr(viewer, name)(obj)
+
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        a = getattr(user, 'is_authenticated', False)
-        return (
-            a and obj.favorited_by.filter(user=user).exists()
-        )
+        return self._get_user_flag(obj, 'is_favorited')
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context['request'].user
-        a = getattr(user, 'is_authenticated', False)
-        return (
-            a and obj.in_carts.filter(user=user).exists()
-        )
+        return self._get_user_flag(obj, 'is_in_shopping_cart')
+
+    def get_image_variants(self, obj):
+        return build_image_urls(obj, self.context.get('request'))
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        try:
-            url = obj.image.url
-        except Exception:
-            return ''
-        return request.build_absolute_uri(url) if request else url
+        return build_image_url(obj, self.context.get('request'))
+
+
+@extend_schema_serializer(component_name='RecipeList')
+class RecipeListReadSerializer(RecipeListSerializer):
+    """
+    Тот же ответ, что у RecipeListSerializer, но собранный обычными
+    словарями из предзагруженных объектов, без обхода полей DRF.
+    Поля родителя остаются для схемы API. Ответы обоих сериализаторов
+    сверяет команда benchmark_serializers.
+    """
+
+    def to_representation(self, recipe):
+        with serialization_timer():
+            images = self.get_image_variants(recipe)
+            return {
+                'id': recipe.id,
+                'tags': [
+                    {'id': tag.id, 'name': tag.name, 'slug': tag.slug}
+                    for tag in recipe.tags.all()
+                ],
+                'author': self._author(recipe.author),
+                'ingredients': [
+                    {
+                        'id': item.ingredient_id,
+                        'name': item.ingredient.name,
+                        'measurement_unit': item.ingredient.measurement_unit,
+                        'amount': item.amount,
+                    }
+                    for item in recipe.ingredients.all()
+                ],
+                'is_favorited': self.get_is_favorited(recipe),
+                'is_in_shopping_cart': self.get_is_in_shopping_cart(recipe),
+                'name': recipe.name,
+                'image': images[MAIN_IMAGE_VARIANT],
+                'image_variants': images,
+                'text': recipe.text,
+                'cooking_time': recipe.cooking_time,
+            }
+
+    def _author(self, author):
+        is_subscribed = getattr(author, 'is_subscribed', None)
+        if is_subscribed is None:
+            is_subscribed = get_viewer_context(
+                self.context['request']
+            ).is_subscribed(author)
+        return {
+            'id': author.id,
+            'email': author.email,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'avatar': author.avatar,
+            'is_subscribed': is_subscribed,
+        }
 
 
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
@@ -149,11 +264,18 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     _('Количество должно быть >= 1.')
                 )
-            if not Ingredient.objects.filter(pk=iid).exists():
+            seen.add(iid)
+        existing = set(
+            Ingredient.objects.filter(pk__in=seen).values_list(
+                'pk', flat=True
+            )
+        )
+        for item in value:
+            iid = item.get('id')
+            if iid not in existing:
                 raise serializers.ValidationError(
                     _(f'Ингредиент с id={iid} не найден.')
                 )
-            seen.add(iid)
         return value
 
     def validate_tags(self, value):
@@ -168,25 +290,27 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             )
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients_data = validated_data.pop('ingredients')
         image_data = validated_data.pop('image', None)
+        if image_data is not None:
+            validated_data['image'] = image_data
 
         recipe = Recipe.objects.create(
             author=self.context['request'].user,
             **validated_data
         )
         recipe.tags.set(tags)
-        for item in ingredients_data:
-            IngredientInRecipe.objects.create(
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
                 recipe=recipe,
                 ingredient_id=item['id'],
                 amount=item['amount']
             )
-        if image_data is not None:
-            recipe.image = image_data
-        recipe.save()
+            for item in ingredients_data
+        )
         return recipe
 
     def validate(self, attrs):
@@ -201,6 +325,42 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 })
         return super().validate(attrs)
 
+    def set_ingredients(self, recipe, ingredients_data):
+        """
+        Приводит ингредиенты рецепта к ingredients_data, меняя только
+        отличающиеся строки: новые вставляются, лишние удаляются,
+        у оставшихся обновляется количество. Возвращает id ингредиентов,
+        строки которых изменились.
+        """
+        amounts = {item['id']: item['amount'] for item in ingredients_data}
+        current = {
+            row.ingredient_id: row
+            for row in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+        stale = [
+            row.pk for iid, row in current.items() if iid not in amounts
+        ]
+        changed = []
+        for iid, row in current.items():
+            if iid in amounts and row.amount != amounts[iid]:
+                row.amount = amounts[iid]
+                changed.append(row)
+        added = [
+            IngredientInRecipe(recipe=recipe, ingredient_id=iid, amount=amt)
+            for iid, amt in amounts.items() if iid not in current
+        ]
+        if stale:
+            IngredientInRecipe.objects.filter(pk__in=stale).delete()
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+        if added:
+            IngredientInRecipe.objects.bulk_create(added)
+        return (
+            set(current) - set(amounts)
+            | {row.ingredient_id for row in changed + added}
+        )
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags_data = validated_data.pop('tags', None)
         ingredients_data = validated_data.pop('ingredients', None)
@@ -213,17 +373,15 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             instance.tags.set(tags_data)
 
         if ingredients_data is not None:
-            IngredientInRecipe.objects.filter(recipe=instance).delete()
-            for item in ingredients_data:
-                IngredientInRecipe.objects.create(
-                    recipe=instance,
-                    ingredient_id=item['id'],
-                    amount=item['amount']
-                )
+            touched = self.set_ingredients(instance, ingredients_data)
+            if touched:
+                refresh_recipe_ingredients(instance.pk, touched)
 
         if image_data is not None:
             instance.image = image_data
 
+        # Одно сохранение меняет версию и сбрасывает кэш за все
+        # изменения ингредиентов сразу (см. recipe_ingredient_changed).
         instance.save()
         return instance
 
@@ -0,0 +1,188 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import IngredientInRecipe, ShoppingCart, ShoppingListItem
+
+STREAM_CHUNK_SIZE = 500
+BULK_BATCH_SIZE = 1000
+
+SHOPPING_LIST_FORMATS = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+
+
+def get_shopping_list(user):
+    """
+    Строки списка покупок пользователя (название, единица, сумма),
+    отсортированные по названию, из таблицы ShoppingListItem.
+    """
+    return (
+        ShoppingListItem.objects
+        .filter(user=user)
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
+        .values_list(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'total_amount',
+        )
+    )
+
+
+def _cart_totals(users=None, ingredients=None):
+    """(user_id, ingredient_id, сумма) по корзинам пользователей users."""
+    # Условия на корзину задаются одним filter(): каждый следующий
+    # filter() по многозначной связи добавил бы ещё один JOIN корзин
+    # и умножил суммы на число корзин с рецептом.
+    cart = {'recipe__in_carts__isnull': False}
+    if users is not None:
+        cart['recipe__in_carts__user__in'] = users
+    rows = IngredientInRecipe.objects.filter(**cart)
+    if ingredients is not None:
+        rows = rows.filter(ingredient__in=ingredients)
+    return (
+        rows.values_list('recipe__in_carts__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+
+def _items(totals):
+    return (
+        ShoppingListItem(
+            user_id=user_id, ingredient_id=ingredient_id, total_amount=total
+        )
+        for user_id, ingredient_id, total in totals
+    )
+
+
+@transaction.atomic(savepoint=False)
+def refresh_shopping_lists(users, ingredients=None):
+    """
+    Пересчитывает по корзинам строки списков покупок пользователей
+    users (id или QuerySet) для ингредиентов ingredients (id или
+    QuerySet; None — все). Строки, сумма которых стала нулевой,
+    удаляются. Конфликт с параллельным пересчётом тех же строк
+    разрешается в пользу последнего.
+    """
+    items = list(_items(_cart_totals(users, ingredients)))
+    stale = ShoppingListItem.objects.filter(user__in=users)
+    if ingredients is not None:
+        stale = stale.filter(ingredient__in=ingredients)
+    stale.delete()
+    if items:
+        ShoppingListItem.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=('user', 'ingredient'),
+            update_fields=('total_amount',),
+        )
+
+
+def refresh_cart_recipe(user_id, recipe_id):
+    """Рецепт добавлен в корзину пользователя или убран из неё."""
+    refresh_shopping_lists(
+        [user_id],
+        IngredientInRecipe.objects.filter(recipe_id=recipe_id)
+        .values('ingredient'),
+    )
+
+
+def carted_users(recipe_id):
+    return ShoppingCart.objects.filter(recipe_id=recipe_id).values('user')
+
+
+def refresh_recipe_ingredients(recipe_id, ingredient_ids=None):
+    """
+    У рецепта изменились ингредиенты ingredient_ids (None — неизвестно
+    какие): пересчитываются списки всех, у кого рецепт в корзине.
+    """
+    refresh_shopping_lists(carted_users(recipe_id), ingredient_ids)
+
+
+def shopping_list_mismatches():
+    """
+    Расхождения таблицы списков покупок с суммами, посчитанными заново
+    по корзинам: {(user_id, ingredient_id): (в таблице, по корзинам)}.
+    """
+    expected = {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in _cart_totals().iterator()
+    }
+    actual = {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in
+        ShoppingListItem.objects.values_list(
+            'user', 'ingredient', 'total_amount'
+        ).iterator()
+    }
+    return {
+        key: (actual.get(key), expected.get(key))
+        for key in expected.keys() | actual.keys()
+        if actual.get(key) != expected.get(key)
+    }
+
+
+@transaction.atomic
+def rebuild_shopping_lists(batch_size=BULK_BATCH_SIZE):
+    """Пересобирает все списки покупок по корзинам."""
+    ShoppingListItem.objects.all().delete()
+    items = _items(_cart_totals().iterator(chunk_size=batch_size))
+    created = 0
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return created
+        ShoppingListItem.objects.bulk_create(batch)
+        created += len(batch)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _render_txt(rows):
+    for name, unit, amount in rows:
+        yield f'{name} ({unit}) — {amount}\n'
+
+
+def _render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _render_json(rows):
+    yield '['
+    separator = ''
+    for name, unit, amount in rows:
+        item = json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False,
+        )
+        yield f'{separator}{item}'
+        separator = ','
+    yield ']'
+
+
+_RENDERERS = {
+    'txt': _render_txt,
+    'csv': _render_csv,
+    'json': _render_json,
+}
+
+
+def stream_shopping_list(rows, file_format):
+    """
+    Генератор частей файла списка покупок. Строки читаются из БД
+    курсором по мере отдачи, поэтому память не зависит от размера списка.
+    """
+    render = _RENDERERS[file_format]
+    return render(rows.iterator(chunk_size=STREAM_CHUNK_SIZE))
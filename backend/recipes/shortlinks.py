@@ -0,0 +1,108 @@
+"""
+Короткие ссылки на рецепты вида /s/<code>/.
+
+Код — base62 от первичного ключа рецепта: он короткий, уникален без
+проверок на коллизии и не зависит от хоста, с которого ссылку
+запросили. Соответствие «код → рецепт» кэшируется надолго, так что
+переход по общей ссылке обходится одним обращением к кэшу.
+"""
+import string
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponseRedirect
+
+from .models import Recipe, ShortLink
+from foodgram.replicas import read_from_primary
+
+ALPHABET = string.digits + string.ascii_letters
+BULK_BATCH_SIZE = 1000
+
+
+def encode_base62(number):
+    if number < 0:
+        raise ValueError('Ожидается неотрицательное число.')
+    code = ''
+    while True:
+        number, digit = divmod(number, len(ALPHABET))
+        code = ALPHABET[digit] + code
+        if not number:
+            return code
+
+
+def _cache_key(code):
+    return f'shortlink:{code}'
+
+
+def get_or_create_link(recipe_id):
+    """Код ссылки рецепта; ссылка создаётся при первом обращении."""
+    link, _ = ShortLink.objects.get_or_create(
+        recipe_id=recipe_id, defaults={'code': encode_base62(recipe_id)}
+    )
+    return link.code
+
+
+def resolve_code(code):
+    """id рецепта по коду или None, если такой ссылки нет."""
+    key = _cache_key(code)
+    recipe_id = cache.get(key)
+    if recipe_id is None:
+        with read_from_primary():
+            recipe_id = (
+                ShortLink.objects.filter(code=code)
+                .values_list('recipe_id', flat=True).first()
+            )
+        if recipe_id is not None:
+            cache.set(key, recipe_id, settings.SHORT_LINK_CACHE_TIMEOUT)
+    return recipe_id
+
+
+def short_link_redirect(request, code):
+    """Переход по короткой ссылке /s/<code>/ на страницу рецепта."""
+    recipe_id = resolve_code(code)
+    if recipe_id is None:
+        raise Http404('Ссылка не найдена.')
+    return HttpResponseRedirect(f'/recipes/{recipe_id}')
+
+
+def forget_code(code):
+    cache.delete(_cache_key(code))
+
+
+def generate_links(batch_size=BULK_BATCH_SIZE):
+    """
+    Создаёт ссылки для всех рецептов, у которых их ещё нет, пачками
+    bulk_create, и сразу кладёт коды в кэш. Возвращает число
+    созданных ссылок.
+
+    Строки, пропущенные из-за конфликта (ссылку успел создать
+    параллельный запрос или код занят), не считаются, а в кэш идут
+    только ссылки, перечитанные из БД после вставки.
+    """
+    missing = (
+        Recipe.objects.filter(shortlink__isnull=True)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    created = 0
+    last_pk = 0
+    while True:
+        recipe_ids = list(missing.filter(pk__gt=last_pk)[:batch_size])
+        if not recipe_ids:
+            return created
+        links = [
+            ShortLink(recipe_id=pk, code=encode_base62(pk))
+            for pk in recipe_ids
+        ]
+        ShortLink.objects.bulk_create(links, ignore_conflicts=True)
+        stored = dict(
+            ShortLink.objects.filter(recipe_id__in=recipe_ids)
+            .values_list('code', 'recipe_id')
+        )
+        cache.set_many(
+            {_cache_key(code): pk for code, pk in stored.items()},
+            settings.SHORT_LINK_CACHE_TIMEOUT,
+        )
+        created += sum(
+            stored.get(link.code) == link.recipe_id for link in links
+        )
+        last_pk = recipe_ids[-1]
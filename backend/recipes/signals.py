@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .counters import change_counter, change_counters, deleted_directly
+from .images import delete_image_variants
+from .models import (Favorite, IngredientInRecipe, Recipe, ShoppingCart,
+                     ShortLink)
+from .response_cache import invalidate, invalidate_recipes, viewer_group
+from .shopping_list import (carted_users, refresh_cart_recipe,
+                            refresh_recipe_ingredients,
+                            refresh_shopping_lists)
+from .shortlinks import forget_code
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def viewer_state_changed(sender, instance, **kwargs):
+    invalidate([viewer_group(instance.user_id)])
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, origin=None, **kwargs):
+    if deleted_directly(sender, instance, origin):
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_item_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'in_carts_count', 1)
+        refresh_cart_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def cart_item_deleted(sender, instance, origin=None, **kwargs):
+    # Каскад от рецепта пересчитывает recipe_deleted, а каскад от
+    # пользователя удаляет его список целиком.
+    if deleted_directly(sender, instance, origin):
+        change_counter(Recipe, instance.recipe_id, 'in_carts_count', -1)
+        refresh_cart_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Избранное и корзина пользователя удаляются каскадом: счётчики
+    # рецептов уменьшаются двумя UPDATE, а не по одному на строку.
+    change_counters(
+        Recipe.objects.filter(favorited_by__user=instance),
+        'favorites_count', -1,
+    )
+    change_counters(
+        Recipe.objects.filter(in_carts__user=instance), 'in_carts_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_carted_ingredients(sender, instance, **kwargs):
+    # После каскадного удаления не узнать, чьи списки затронуты.
+    instance._carted = (
+        list(carted_users(instance.pk).values_list('user', flat=True)),
+        list(instance.ingredients.values_list('ingredient', flat=True)),
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, origin=None, **kwargs):
+    if deleted_directly(sender, instance, origin):
+        change_counter(User, instance.author_id, 'recipes_count', -1)
+    delete_image_variants(instance.image.name)
+    users, ingredients = getattr(instance, '_carted', ((), ()))
+    if users:
+        refresh_shopping_lists(users, ingredients)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(pre_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+def recipe_ingredient_changed(sender, instance, origin=None, **kwargs):
+    # Каскад от рецепта или его автора сбрасывает кэш в recipe_changed,
+    # а массовое удаление строк (RecipeCreateUpdateSerializer.
+    # set_ingredients) завершается сохранением рецепта, которое меняет
+    # версию и сбрасывает кэш один раз, а не на каждую строку.
+    if isinstance(origin, (Recipe, User)) or (
+        isinstance(origin, QuerySet)
+        and origin.model in (Recipe, User, IngredientInRecipe)
+    ):
+        return
+    Recipe.objects.filter(pk=instance.recipe_id).touch()
+    invalidate_recipes([instance.recipe_id])
+    # Правка по одной строке (админка): прежний ингредиент строки
+    # неизвестен, поэтому списки пересчитываются целиком. Массовые
+    # изменения из RecipeCreateUpdateSerializer пересчитывают их сами.
+    if origin is None or origin is instance:
+        refresh_recipe_ingredients(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        recipe_ids = pk_set or instance.recipes.values_list('pk', flat=True)
+        Recipe.objects.filter(pk__in=recipe_ids).touch()
+        invalidate_recipes(recipe_ids, [instance.pk])
+    else:
+        Recipe.objects.filter(pk=instance.pk).touch()
+        invalidate_recipes([instance.pk], pk_set or ())
+
+
+@receiver(post_delete, sender=ShortLink)
+def short_link_deleted(sender, instance, **kwargs):
+    forget_code(instance.code)
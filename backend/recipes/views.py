@@ -1,4 +1,5 @@
-from django.http import HttpResponse
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import status, viewsets
@@ -7,21 +8,38 @@ from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
     IsAuthenticated,
 )
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
+from .conditional import ConditionalRecipeMixin
 from .filters import RecipeFilter
-from .models import Favorite, Recipe, ShoppingCart, ShortLink
-from .pagination import PageNumberLimitPagination
+from .models import Favorite, IngredientInRecipe, Recipe, ShoppingCart
+from .negotiation import IgnoreFormatContentNegotiation
+from .pagination import FeedCursorPagination, PageNumberOrCursorPagination
 from .permissions import IsAuthorOrReadOnly
+from .response_cache import AnonymousResponseCacheMixin
 from .serializers import (RecipeCreateUpdateSerializer,
-                          RecipeListSerializer,
+                          RecipeListReadSerializer,
                           RecipeMiniFieldSerializer)
+from .shopping_list import (SHOPPING_LIST_FORMATS, get_shopping_list,
+                            stream_shopping_list)
+from .shortlinks import get_or_create_link
+from foodgram.renderers import FastJSONRenderer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalRecipeMixin,
+    AnonymousResponseCacheMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet для REST API рецептов:
     - GET /api/recipes/                список с фильтрацией и пагинацией
+      (?cursor= включает курсорную пагинацию)
+
+    Список и деталь для анонимных пользователей отдаются из кэша
+    ответов, см. response_cache; оба поддерживают условные GET
+    по ETag, см. conditional.
     - POST /api/recipes/               создание рецепта
     - GET /api/recipes/{id}/           получение детали рецепта
     - PATCH/PUT /api/recipes/{id}/     частичное/полное обновление
@@ -30,22 +48,39 @@ class RecipeViewSet(viewsets.ModelViewSet):
     - POST/DELETE /api/recipes/{id}/shopping_cart/  список покупок
     - GET  /api/recipes/{id}/get-link/               получение короткой ссылки
     - GET  /api/recipes/download_shopping_cart/      файл списка покупок
+      (?format=txt|csv|json, по умолчанию txt)
+    - GET  /api/recipes/feed/          рецепты авторов из подписок,
+      новые сначала, с курсорной пагинацией
     """
     queryset = (
         Recipe.objects.all().order_by('-id')
         .select_related('author')
-        .prefetch_related('tags', 'ingredients')
-        .distinct()
+        .prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
     )
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
-    pagination_class = PageNumberLimitPagination
+    pagination_class = PageNumberOrCursorPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    mini_actions = ('favorite', 'shopping_cart', 'get_link')
+
+    def get_queryset(self):
+        if self.action in self.mini_actions:
+            return Recipe.objects.all()
+        return super().get_queryset().with_user_flags(self.request.user)
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
             return RecipeCreateUpdateSerializer
-        return RecipeListSerializer
+        return RecipeListReadSerializer
 
     def create(self, request, *args, **kwargs):
         serializer = RecipeCreateUpdateSerializer(
@@ -53,7 +88,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         recipe = serializer.save()
-        out = RecipeListSerializer(recipe, context={'request': request})
+        recipe = self.get_queryset().get(pk=recipe.pk)
+        out = RecipeListReadSerializer(recipe, context={'request': request})
         return Response(out.data, status=status.HTTP_201_CREATED)
 
     def partial_update(self, request, *args, **kwargs):
@@ -71,7 +107,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         recipe = serializer.save()
-        out = RecipeListSerializer(recipe, context={'request': request})
+        recipe = self.get_queryset().get(pk=recipe.pk)
+        out = RecipeListReadSerializer(recipe, context={'request': request})
         return Response(out.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -154,37 +191,42 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_link(self, request, pk=None):
         recipe = self.get_object()
-        short, _ = ShortLink.objects.get_or_create(
-            recipe=recipe,
-            defaults={
-                'short_url': request.build_absolute_uri(
-                    f'/recipes/{recipe.pk}'
-                )
-            },
-        )
+        code = get_or_create_link(recipe.pk)
         return Response(
-            {'short-link': short.short_url}, status=status.HTTP_200_OK
+            {'short-link': request.build_absolute_uri(f'/s/{code}/')},
+            status=status.HTTP_200_OK,
         )
 
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedCursorPagination,
+    )
+    def feed(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=False,
         methods=['get'],
         url_path='download_shopping_cart',
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        content_negotiation_class=IgnoreFormatContentNegotiation,
     )
     def download_shopping_cart(self, request):
-        ingredients = {}
-        for cart in ShoppingCart.objects.filter(user=request.user):
-            for ingr in cart.recipe.ingredients.all():
-                key = (ingr.ingredient.name, ingr.ingredient.measurement_unit)
-                ingredients[key] = ingredients.get(key, 0) + ingr.amount
-        lines = [
-            f"{name} ({unit}) — {amt}"
-            for (name, unit), amt in ingredients.items()
-        ]
-        txt = "\n".join(lines)
-        resp = HttpResponse(txt, content_type="text/plain")
+        file_format = request.query_params.get('format', 'txt')
+        if file_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                {'detail': 'Допустимые форматы: txt, csv, json.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        resp = StreamingHttpResponse(
+            stream_shopping_list(get_shopping_list(request.user), file_format),
+            content_type=SHOPPING_LIST_FORMATS[file_format],
+        )
         resp["Content-Disposition"] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{file_format}"'
         )
         return resp
@@ -0,0 +1,20 @@
+"""Асинхронный список тегов (ASGI): из кэша справочника без БД."""
+from .registry import TAGS_CATALOGUE
+from .urls import urlpatterns
+from .views import TagViewSet
+from foodgram.asynchrony import async_read_view, route_callback
+from foodgram.caching import acached_catalogue_response
+from users.authentication import aget_request_user
+
+
+async def list_fast_path(request):
+    if await aget_request_user(request) is None:
+        return None
+    return await acached_catalogue_response(
+        request, TAGS_CATALOGUE, TagViewSet.catalogue_max_age
+    )
+
+
+tag_list = async_read_view(
+    route_callback(urlpatterns, 'tags-list'), list_fast_path
+)
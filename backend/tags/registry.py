@@ -0,0 +1,42 @@
+from django.core.cache import cache
+
+from .models import Tag
+from foodgram.caching import CatalogueVersion
+from foodgram.replicas import read_from_primary
+
+TAGS_CATALOGUE = CatalogueVersion('tags')
+TAG_REGISTRY_CACHE_KEY = 'tags:registry'
+TAG_REGISTRY_TIMEOUT = 300
+
+
+def get_tag_registry():
+    """
+    Словарь {slug: id} всех тегов. Хранится в кэше и сбрасывается
+    сигналами при изменении тегов; таймаут страхует процессы с локальным
+    кэшем, до которых сброс не доходит.
+    """
+    registry = cache.get(TAG_REGISTRY_CACHE_KEY)
+    if registry is None:
+        with read_from_primary():
+            registry = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(TAG_REGISTRY_CACHE_KEY, registry, TAG_REGISTRY_TIMEOUT)
+    return registry
+
+
+async def aget_tag_registry():
+    registry = await cache.aget(TAG_REGISTRY_CACHE_KEY)
+    if registry is None:
+        with read_from_primary():
+            registry = {
+                slug: pk async for slug, pk in Tag.objects.values_list(
+                    'slug', 'id'
+                )
+            }
+        await cache.aset(
+            TAG_REGISTRY_CACHE_KEY, registry, TAG_REGISTRY_TIMEOUT
+        )
+    return registry
+
+
+def reset_tag_registry():
+    cache.delete(TAG_REGISTRY_CACHE_KEY)
@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
+from foodgram.timing import TimedSerializerMixin
+
 from .models import Tag
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name', 'slug')
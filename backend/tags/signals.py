@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Tag
+from .registry import TAGS_CATALOGUE, reset_tag_registry
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    reset_tag_registry()
+    TAGS_CATALOGUE.bump()
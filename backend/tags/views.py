@@ -1,9 +1,12 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from .models import Tag
+from .registry import TAGS_CATALOGUE
 from .serializers import TagSerializer
+from foodgram.caching import CachedCatalogueListMixin
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CachedCatalogueListMixin, ReadOnlyModelViewSet):
+    catalogue_version = TAGS_CATALOGUE
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
@@ -8,7 +8,10 @@ from .models import User, Subscription
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
-    list_display = ('username', 'email', 'first_name', 'last_name')
+    list_display = (
+        'username', 'email', 'first_name', 'last_name',
+        'recipes_count', 'subscribers_count',
+    )
     search_fields = ('username', 'email')
 
 
@@ -0,0 +1,65 @@
+"""
+Асинхронный список подписок (ASGI): страница авторов и их последние
+рецепты загружаются асинхронным ORM, сериализация идёт по уже
+загруженным объектам. Курсорную пагинацию, ошибки параметров
+и неавторизованные запросы обрабатывает UserViewSet.
+"""
+from django.core.paginator import InvalidPage
+from django.db.models import Value
+from rest_framework.exceptions import ValidationError
+
+from .authentication import aget_request_user
+from .serializers.with_recipes import (UserWithRecipesSerializer,
+                                       attach_latest_recipes,
+                                       get_recipes_limit)
+from .urls import urlpatterns
+from foodgram.asynchrony import (accepts_json, async_read_view, drf_request,
+                                 json_response, route_callback)
+from recipes.models import Recipe
+from recipes.pagination import PageNumberOrCursorPagination
+
+
+async def subscriptions_fast_path(request):
+    pagination = PageNumberOrCursorPagination()
+    if (
+        not accepts_json(request)
+        or pagination.cursor_query_param in request.GET
+    ):
+        return None
+    user = await aget_request_user(request)
+    if user is None or not user.is_authenticated:
+        return None
+    wrapped = drf_request(request, user)
+    try:
+        limit = get_recipes_limit(wrapped)
+    except ValidationError:
+        return None
+    authors = (
+        user.subscriptions.annotate(is_subscribed=Value(True))
+        .order_by('-id')
+    )
+    paginator = pagination.django_paginator_class(
+        authors, pagination.get_page_size(wrapped)
+    )
+    paginator.count = await authors.acount()
+    try:
+        page = paginator.page(pagination.get_page_number(wrapped, paginator))
+    except InvalidPage:
+        return None
+    page.object_list = [author async for author in page.object_list]
+    attach_latest_recipes(page.object_list, [
+        recipe async for recipe in
+        Recipe.objects.latest_by_author(page.object_list, limit)
+    ])
+    pagination.page = page
+    pagination.request = wrapped
+    data = UserWithRecipesSerializer(
+        page.object_list, many=True, context={'request': wrapped}
+    ).data
+    return json_response(pagination.get_paginated_response(data).data)
+
+
+subscriptions = async_read_view(
+    route_callback(urlpatterns, 'users-subscriptions'),
+    subscriptions_fast_path,
+)
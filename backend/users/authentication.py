@@ -0,0 +1,81 @@
+"""
+Аутентификация по токену с кэшированием пары (пользователь, токен).
+
+Запись живёт AUTH_TOKEN_CACHE_TIMEOUT секунд и удаляется сигналами
+сразу при удалении токена (выход), смене пароля, деактивации и любом
+другом сохранении пользователя. Изменения через QuerySet.update()
+сигналов не дают и видны только после истечения записи.
+
+Кэш используется только общий (SHARED_CACHE): из кэша в памяти процесса
+сигнал удалит запись лишь в своём процессе, и другие продолжили бы
+пускать по отозванному токену. Без общего кэша проверка идёт как
+у обычной TokenAuthentication.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def token_cache_key(key):
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def evict_token(key):
+    """
+    Удаляет запись сразу и ещё раз после коммита: запрос, прочитавший
+    токен до коммита, мог успеть положить его в кэш снова.
+    """
+    cache_key = token_cache_key(key)
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    cache_timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT
+
+    def authenticate_credentials(self, key):
+        if not settings.SHARED_CACHE:
+            return super().authenticate_credentials(key)
+        cache_key = token_cache_key(key)
+        credentials = cache.get(cache_key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials, self.cache_timeout)
+        return credentials
+
+
+async def aget_request_user(request):
+    """
+    Пользователь запроса для асинхронных представлений: то же, что
+    даёт CachedTokenAuthentication, через асинхронный кэш и ORM.
+    None — токен неверен или заголовок некорректен; такие запросы
+    нужно отдать синхронному DRF, чтобы ответ об ошибке был тем же.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    keyword = CachedTokenAuthentication.keyword.lower()
+    if not header or header[0].lower() != keyword:
+        return AnonymousUser()
+    if len(header) != 2:
+        return None
+    cache_key = token_cache_key(header[1])
+    credentials = None
+    if settings.SHARED_CACHE:
+        credentials = await cache.aget(cache_key)
+    if credentials is None:
+        token = await Token.objects.select_related('user').filter(
+            key=header[1]
+        ).afirst()
+        if token is None or not token.user.is_active:
+            return None
+        credentials = (token.user, token)
+        if settings.SHARED_CACHE:
+            await cache.aset(
+                cache_key, credentials,
+                CachedTokenAuthentication.cache_timeout,
+            )
+    return credentials[0]
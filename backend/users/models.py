@@ -1,8 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from foodgram.counters import CounterFieldsMixin
 
-class User(AbstractUser):
+
+class User(CounterFieldsMixin, AbstractUser):
     email = models.EmailField(unique=True, verbose_name='Электронная почта')
     avatar = models.URLField(blank=True, null=True, verbose_name='Аватар')
     subscriptions = models.ManyToManyField(
@@ -21,13 +23,45 @@ class User(AbstractUser):
         blank=False,
         verbose_name='Фамилия'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='рецептов',
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='подписчиков',
+    )
+    COUNTER_FIELDS = ('recipes_count', 'subscribers_count')
+    # Поля, которые видны в рецептах как данные автора.
+    PROFILE_FIELDS = ('email', 'username', 'first_name', 'last_name', 'avatar')
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
 
+    _loaded_profile = None
+
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'пользователи'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_profile = instance._profile()
+        return instance
+
+    def _profile(self):
+        return tuple(self.__dict__.get(name) for name in self.PROFILE_FIELDS)
+
+    def profile_changed(self):
+        """Изменились ли с загрузки поля, видные в рецептах автора."""
+        return self._profile() != self._loaded_profile
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_profile = self._profile()
+
 
 class Subscription(models.Model):
     user = models.ForeignKey(
@@ -3,6 +3,9 @@ from django.contrib.auth.hashers import check_password
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from foodgram.timing import TimedSerializerMixin
+from users.viewer import get_viewer_context
+
 MAX_NAME_LENGTH = 150
 
 User = get_user_model()
@@ -60,7 +63,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -72,10 +75,9 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return obj.subscribers.filter(pk=user.pk).exists()
+        if getattr(obj, 'is_subscribed', None) is not None:
+            return obj.is_subscribed
+        return get_viewer_context(self.context['request']).is_subscribed(obj)
 
 
 class SetAvatarSerializer(serializers.Serializer):
@@ -1,11 +1,54 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from .base import UserSerializer
-from recipes.serializers import RecipeMiniFieldSerializer
+from recipes.models import Recipe
 
 User = get_user_model()
 
+MAX_RECIPES_LIMIT = 100
+
+
+def get_recipes_limit(request):
+    """
+    Значение ?recipes_limit=: None, если не задано, иначе целое
+    от 0 до MAX_RECIPES_LIMIT. Некорректное значение — ошибка 400.
+    """
+    limit = request.query_params.get('recipes_limit')
+    if not limit:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise serializers.ValidationError({
+            'recipes_limit': 'Должно быть неотрицательным целым числом.'
+        })
+    return min(limit, MAX_RECIPES_LIMIT)
+
+
+def attach_latest_recipes(authors, recipes):
+    """Раскладывает рецепты по author.latest_recipes их авторов."""
+    by_author = defaultdict(list)
+    for recipe in recipes:
+        by_author[recipe.author_id].append(recipe)
+    for author in authors:
+        author.latest_recipes = by_author[author.pk]
+    return authors
+
+
+def prefetch_latest_recipes(authors, limit):
+    """
+    Загружает последние рецепты всех авторов страницы одним запросом
+    и кладёт их в author.latest_recipes.
+    """
+    return attach_latest_recipes(
+        authors, Recipe.objects.latest_by_author(authors, limit)
+    )
+
 
 class UserWithRecipesSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
@@ -15,10 +58,13 @@ class UserWithRecipesSerializer(UserSerializer):
         fields = UserSerializer.Meta.fields + ('recipes', 'recipes_count')
 
     def get_recipes(self, obj):
-        limit = self.context['request'].query_params.get('recipes_limit')
-        qs = obj.recipes.all()
-        if limit:
-            qs = qs[:int(limit)]
+        # recipes.serializers импортирует users.serializers.
+        from recipes.serializers import RecipeMiniFieldSerializer
+
+        qs = getattr(obj, 'latest_recipes', None)
+        if qs is None:
+            limit = get_recipes_limit(self.context['request'])
+            qs = Recipe.objects.latest_by_author([obj], limit)
         return RecipeMiniFieldSerializer(
             qs,
             many=True,
@@ -26,4 +72,4 @@ class UserWithRecipesSerializer(UserSerializer):
         ).data
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import evict_token
+from .models import Subscription, User
+from recipes.counters import (change_counter, change_counters,
+                              deleted_directly)
+from recipes.models import Recipe
+from recipes.response_cache import (invalidate, invalidate_recipes,
+                                    viewer_group)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def viewer_state_changed(sender, instance, **kwargs):
+    invalidate([viewer_group(instance.user_id)])
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, origin=None, **kwargs):
+    if deleted_directly(sender, instance, origin):
+        change_counter(User, instance.author_id, 'subscribers_count', -1)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Подписки пользователя удаляются каскадом: счётчики авторов
+    # уменьшаются одним UPDATE, а не по одному на подписку.
+    change_counters(
+        User.objects.filter(subscriptions_followers__user=instance),
+        'subscribers_count', -1,
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    # Вход, смена пароля и т. п. не видны в рецептах; новый профиль
+    # автора меняет версии и сбрасывает ответы только его рецептов.
+    if created or not instance.profile_changed():
+        return
+    recipe_ids = list(instance.recipes.values_list('pk', flat=True))
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).touch()
+        invalidate_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    evict_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_credentials_changed(sender, instance, created, **kwargs):
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True
+        ):
+            evict_token(key)
@@ -0,0 +1,55 @@
+"""
+Сведения о текущем пользователе, которые нужны сериализаторам: на кого
+он подписан, что у него в избранном и в корзине.
+
+Каждое множество id загружается одним запросом не больше одного раза
+за запрос к API и хранится на объекте запроса, поэтому вложенные
+сериализаторы отвечают на вопросы о принадлежности из памяти.
+"""
+from django.utils.functional import cached_property
+
+from .models import Subscription
+from recipes.models import Favorite, ShoppingCart
+
+
+class ViewerContext:
+    def __init__(self, user):
+        self.user = user
+
+    def _ids(self, model, field):
+        if not getattr(self.user, 'is_authenticated', False):
+            return frozenset()
+        return frozenset(
+            model.objects.filter(user=self.user)
+            .values_list(field, flat=True)
+        )
+
+    @cached_property
+    def subscribed_author_ids(self):
+        return self._ids(Subscription, 'author_id')
+
+    @cached_property
+    def favorite_recipe_ids(self):
+        return self._ids(Favorite, 'recipe_id')
+
+    @cached_property
+    def cart_recipe_ids(self):
+        return self._ids(ShoppingCart, 'recipe_id')
+
+    def is_subscribed(self, author):
+        return author.pk in self.subscribed_author_ids
+
+    def is_favorited(self, recipe):
+        return recipe.pk in self.favorite_recipe_ids
+
+    def is_in_shopping_cart(self, recipe):
+        return recipe.pk in self.cart_recipe_ids
+
+
+def get_viewer_context(request):
+    """Контекст текущего пользователя, общий для всего запроса."""
+    viewer = getattr(request, '_viewer_context', None)
+    if viewer is None or viewer.user is not request.user:
+        viewer = ViewerContext(request.user)
+        request._viewer_context = viewer
+    return viewer
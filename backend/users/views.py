@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Value
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
@@ -8,10 +9,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Subscription
-from recipes.pagination import PageNumberLimitPagination
+from recipes.pagination import (PageNumberLimitPagination,
+                                PageNumberOrCursorPagination)
 from .serializers import (UserCreateSerializer, SetAvatarSerializer,
                           EmailAuthSerializer, SetPasswordSerializer,
                           UserSerializer, UserWithRecipesSerializer)
+from .serializers.with_recipes import (get_recipes_limit,
+                                       prefetch_latest_recipes)
 
 User = get_user_model()
 
@@ -61,17 +65,28 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'], url_path='subscriptions')
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='subscriptions',
+        pagination_class=PageNumberOrCursorPagination,
+    )
     def subscriptions(self, request):
-        authors = request.user.subscriptions.all()
+        limit = get_recipes_limit(request)
+        authors = (
+            request.user.subscriptions.annotate(is_subscribed=Value(True))
+            .order_by('-id')
+        )
         page = self.paginate_queryset(authors)
         if page is not None:
             ser = UserWithRecipesSerializer(
-                page, many=True, context={'request': request}
+                prefetch_latest_recipes(page, limit),
+                many=True,
+                context={'request': request},
             )
             return self.get_paginated_response(ser.data)
         ser = UserWithRecipesSerializer(
-            authors,
+            prefetch_latest_recipes(list(authors), limit),
             many=True,
             context={'request': request}
         )
@@ -132,7 +147,7 @@ class UserViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         request.user.set_password(serializer.validated_data['new_password'])
-        request.user.save()
+        request.user.save(update_fields=['password'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -144,7 +159,7 @@ class UserAvatarView(APIView):
         ser = SetAvatarSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         request.user.avatar = ser.validated_data['avatar']
-        request.user.save()
+        request.user.save(update_fields=['avatar'])
         return Response(
             {'avatar': request.user.avatar},
             status=status.HTTP_200_OK
@@ -152,5 +167,5 @@ class UserAvatarView(APIView):
 
     def delete(self, request):
         request.user.avatar = ''
-        request.user.save()
+        request.user.save(update_fields=['avatar'])
         return Response(status=status.HTTP_204_NO_CONTENT)